@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import argparse
+import json
+import re
 import subprocess
 import sys
 from pathlib import Path
@@ -15,19 +17,63 @@ DEFAULT_ZH_SPEAKER = "云堇"
 DEFAULT_JA_SPEAKER = "ayaka"
 METADATA_PREFIX = "<LILAC_META:v1>"
 MENTION_MARKER = "@df_chatbot"
+OUTPUT_FORMATS: dict[str, tuple[str, str, tuple[str, ...], str]] = {
+    "wav": (".wav", "audio/x-wav", (), ""),
+    "opus": (".ogg", "audio/ogg", ("-c:a", "libopus", "-application", "voip"), "32k"),
+    "mp3": (".mp3", "audio/mpeg", ("-c:a", "libmp3lame"), "64k"),
+}
+POSIX_SPACE = " \t\n\r\v\f"
+PRINTF_ESCAPES = {
+    "\\": "\\",
+    "a": "\a",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+}
+PRINTF_ESCAPE = re.compile(r"\\(0[0-7]{0,3}|[\\abcfnrtv])")
+
+
+def expand_printf_escapes(value: str) -> str:
+    expanded: list[str] = []
+    position = 0
+    for match in PRINTF_ESCAPE.finditer(value):
+        expanded.append(value[position : match.start()])
+        escape = match.group(1)
+        if escape == "c":
+            return "".join(expanded)
+        if escape.startswith("0"):
+            expanded.append(chr(int(escape, 8)))
+        else:
+            expanded.append(PRINTF_ESCAPES[escape])
+        position = match.end()
+
+    expanded.append(value[position:])
+    return "".join(expanded)
+
+
+def normalize_scalar(value: str) -> str:
+    """Undo HA/JSON quoting the same way the shell wrapper's normalize_scalar does."""
+    value = value.removeprefix('"').removesuffix('"').replace('\\"', '"')
+    value = "\n".join(line.strip(POSIX_SPACE) for line in value.split("\n"))
+    return expand_printf_escapes(value.rstrip("\n")).rstrip("\n")
 
 
 def sanitize_message(raw_message: str) -> str:
     cleaned_lines: list[str] = []
-    for original_line in raw_message.splitlines():
-        stripped_line = original_line.strip()
+    for original_line in raw_message.split("\n"):
+        stripped_line = original_line.strip(POSIX_SPACE)
+        if not stripped_line:
+            continue
         if stripped_line.startswith(METADATA_PREFIX):
             continue
         if stripped_line == MENTION_MARKER:
             continue
-        cleaned_lines.append(original_line)
+        cleaned_lines.append(stripped_line)
 
-    return "\n".join(cleaned_lines).strip()
+    return "\n".join(cleaned_lines)
 
 
 def resolve_lang(lang: str) -> str:
@@ -75,6 +121,47 @@ def build_command(
     ]
 
 
+def normalize_request(raw_message: str, lang: str, speaker: str) -> tuple[str, str, str]:
+    """In-process equivalent of df-room-vits-generate.sh for raw HA scalars.
+
+    Returns the sanitized message and resolved lang/speaker that the wrapper
+    would pass to vits-tts; the bridge uses them for the cache key and argv.
+    """
+    clean_message = sanitize_message(normalize_scalar(raw_message))
+    if not clean_message:
+        raise ValueError("message is empty after sanitization")
+    resolved_lang = resolve_lang(normalize_scalar(lang))
+    return clean_message, resolved_lang, resolve_speaker(
+        resolved_lang, normalize_scalar(speaker)
+    )
+
+
+def build_transcode_command(
+    *,
+    ffmpeg_path: str,
+    input_path: str,
+    output_format: str,
+    bitrate: str = "",
+) -> list[str]:
+    if output_format not in OUTPUT_FORMATS or output_format == "wav":
+        raise ValueError(f"unsupported output format: {output_format}")
+
+    suffix, _mime_type, codec_args, default_bitrate = OUTPUT_FORMATS[output_format]
+    return [
+        ffmpeg_path,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        input_path,
+        *codec_args,
+        "-b:a",
+        bitrate or default_bitrate,
+        str(Path(input_path).with_suffix(suffix)),
+    ]
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Generate Home Assistant VITS room broadcast audio"
@@ -86,6 +173,14 @@ def parse_args() -> argparse.Namespace:
     _ = parser.add_argument(
         "--binary", default="/config/bin/vits-tts", help="VITS CLI path"
     )
+    _ = parser.add_argument(
+        "--format",
+        default="wav",
+        choices=sorted(OUTPUT_FORMATS),
+        help="Encode the WAV to Opus or MP3 and print a JSON size report",
+    )
+    _ = parser.add_argument("--bitrate", default="", help="Encoder bitrate override")
+    _ = parser.add_argument("--ffmpeg", default="ffmpeg", help="ffmpeg path")
     return parser.parse_args()
 
 
@@ -96,6 +191,7 @@ def main() -> int:
     lang = cast(str, args.lang)
     speaker = cast(str, args.speaker)
     output = cast(str, args.output)
+    output_format = cast(str, args.format)
 
     command = build_command(
         binary_path=binary,
@@ -107,7 +203,39 @@ def main() -> int:
 
     Path(output).parent.mkdir(parents=True, exist_ok=True)
     completed = subprocess.run(command, check=False)
-    return completed.returncode
+    if completed.returncode != 0 or output_format == "wav":
+        return completed.returncode
+
+    transcode_command = build_transcode_command(
+        ffmpeg_path=cast(str, args.ffmpeg),
+        input_path=output,
+        output_format=output_format,
+        bitrate=cast(str, args.bitrate),
+    )
+    encoded = subprocess.run(transcode_command, check=False)
+    if encoded.returncode != 0:
+        return encoded.returncode
+
+    encoded_path = Path(transcode_command[-1])
+    wav_bytes = Path(output).stat().st_size
+    output_bytes = encoded_path.stat().st_size
+    Path(output).unlink()
+    print(
+        json.dumps(
+            {
+                "output": str(encoded_path),
+                "format": output_format,
+                "mime_type": OUTPUT_FORMATS[output_format][1],
+                "wav_bytes": wav_bytes,
+                "output_bytes": output_bytes,
+                "size_reduction": round(1 - output_bytes / wav_bytes, 4)
+                if wav_bytes
+                else 0.0,
+            },
+            ensure_ascii=False,
+        )
+    )
+    return 0
 
 
 if __name__ == "__main__":
@@ -1,60 +1,708 @@
 from __future__ import annotations
 
 import asyncio
-from pathlib import Path
+import importlib.util
+import logging
+import shutil
+import subprocess
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path, PurePosixPath
+from types import ModuleType
+from typing import Any
+from urllib.parse import quote
+from uuid import uuid4
 
-from homeassistant.core import HomeAssistant, ServiceCall
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.const import ATTR_ENTITY_ID, EVENT_HOMEASSISTANT_STARTED
+from homeassistant.core import Event, HomeAssistant, ServiceCall, callback
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.discovery import async_load_platform
+from homeassistant.helpers.event import async_track_time_interval
+
+from .cache import PhraseCache, cache_key
+from .coalesce import RequestCoalescer
+from .prerender import Phrase, discover_phrases
+from .retention import DEFAULT_PATTERN, RetentionPolicy, sweep, sweep_temporaries
+from .scheduler import (
+    PRIORITIES,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    JobScheduler,
+    QueueFullError,
+)
+from .stats import LatencyStats, RequestTimer
+from .transcode import encoded_path, resolve_format, transcode
+
+_LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "df_vits_bridge"
 SERVICE_GENERATE = "generate"
+SERVICE_PURGE = "purge"
+SERVICE_BROADCAST = "broadcast"
 WRAPPER_PATH = "/config/bin/df-room-vits-generate.sh"
+GENERATOR_FILENAME = "df_room_vits_generate.py"
+VITS_BIN_PATH = "/config/bin/vits-tts"
+WRAPPER_TIMEOUT = 55
 ALLOWED_DIR = Path("/media/vits")
+CACHE_DIR = ALLOWED_DIR / ".cache"
+DATA_STATS = "stats"
+DATA_SCHEDULER = "scheduler"
+
+CONF_PRERENDER = "prerender"
+CONF_PHRASES = "phrases"
+CONF_FROM_SCRIPTS = "from_scripts"
+CONF_START_DELAY = "start_delay"
+PRERENDER_SOURCES = ("scripts.yaml", "automations.yaml")
+
+CONF_RETENTION = "retention"
+CONF_MAX_AGE = "max_age"
+CONF_MAX_FILES = "max_files"
+CONF_MAX_SIZE_MB = "max_size_mb"
+CONF_MIN_AGE = "min_age"
+CONF_PATTERN = "pattern"
+CONF_SCAN_INTERVAL = "scan_interval"
+PLAYING_STATES = ("playing", "paused", "buffering")
+
+CONF_PLAYBACK_BASE_URL = "playback_base_url"
+CONF_DEFAULT_MEDIA_PLAYERS = "default_media_players"
+DEFAULT_PLAYBACK_BASE_URL = "http://192.168.11.201:8123/media/local/vits/"
+DEFAULT_MEDIA_PLAYERS = ["media_player.nestaudio4326"]
+
+CONF_IN_PROCESS = "in_process"
+CONF_SCHEDULER = "scheduler"
+CONF_CONCURRENCY = "concurrency"
+CONF_MAX_QUEUED = "max_queued"
+CONF_PREEMPT = "preempt"
+DEFAULT_CONCURRENCY = {"urgent": 1, "normal": 1, "low": 1}
+DEFAULT_MAX_QUEUED = {"urgent": 10, "normal": 10, "low": 100}
+
+PHRASE_SCHEMA = vol.Any(
+    cv.string,
+    vol.Schema(
+        {
+            vol.Required("text"): cv.string,
+            vol.Optional("lang", default="zh"): cv.string,
+            vol.Optional("speaker", default=""): cv.string,
+        }
+    ),
+)
+
+PRERENDER_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_PHRASES, default=[]): vol.All(
+            cv.ensure_list, [PHRASE_SCHEMA]
+        ),
+        vol.Optional(CONF_FROM_SCRIPTS, default=True): cv.boolean,
+        vol.Optional(CONF_START_DELAY, default=30): cv.positive_int,
+    }
+)
+
+RETENTION_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_MAX_AGE, default=timedelta(days=3)): cv.time_period,
+        vol.Optional(CONF_MAX_FILES, default=500): cv.positive_int,
+        vol.Optional(CONF_MAX_SIZE_MB, default=512): cv.positive_int,
+        vol.Optional(CONF_MIN_AGE, default=timedelta(minutes=10)): cv.time_period,
+        vol.Optional(CONF_PATTERN, default=DEFAULT_PATTERN): cv.string,
+        vol.Optional(CONF_SCAN_INTERVAL, default=timedelta(hours=1)): cv.time_period,
+    }
+)
+
+SCHEDULER_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_CONCURRENCY, default=DEFAULT_CONCURRENCY): vol.Schema(
+            {
+                vol.Optional(priority, default=DEFAULT_CONCURRENCY[priority]): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                )
+                for priority in PRIORITIES
+            }
+        ),
+        vol.Optional(CONF_MAX_QUEUED, default=DEFAULT_MAX_QUEUED): vol.Schema(
+            {
+                vol.Optional(priority, default=DEFAULT_MAX_QUEUED[priority]): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)
+                )
+                for priority in PRIORITIES
+            }
+        ),
+        vol.Optional(CONF_PREEMPT, default=True): cv.boolean,
+    }
+)
+
+BROADCAST_SCHEMA = vol.Schema(
+    {
+        vol.Required("text"): cv.string,
+        vol.Optional("lang", default="zh"): cv.string,
+        vol.Optional("speaker", default=""): cv.string,
+        vol.Optional("output"): cv.string,
+        vol.Optional("format", default="wav"): cv.string,
+        vol.Optional("bitrate", default=""): cv.string,
+        vol.Optional("priority", default=PRIORITY_NORMAL): vol.In(PRIORITIES),
+        vol.Optional("media_players"): vol.Any(None, cv.entity_ids),
+        vol.Optional("volume"): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+    }
+)
+
+PURGE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_MAX_AGE): cv.time_period,
+        vol.Optional(CONF_MAX_FILES): cv.positive_int,
+        vol.Optional(CONF_MAX_SIZE_MB): cv.positive_int,
+    }
+)
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.All(
+            lambda value: value or {},
+            vol.Schema(
+                {
+                    vol.Optional(CONF_PRERENDER, default={}): PRERENDER_SCHEMA,
+                    vol.Optional(CONF_RETENTION, default={}): RETENTION_SCHEMA,
+                    vol.Optional(CONF_SCHEDULER, default={}): SCHEDULER_SCHEMA,
+                    vol.Optional(CONF_IN_PROCESS, default=True): cv.boolean,
+                    vol.Optional(
+                        CONF_PLAYBACK_BASE_URL, default=DEFAULT_PLAYBACK_BASE_URL
+                    ): cv.url,
+                    vol.Optional(
+                        CONF_DEFAULT_MEDIA_PLAYERS, default=DEFAULT_MEDIA_PLAYERS
+                    ): cv.entity_ids,
+                }
+            ),
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+def load_generator(path: str) -> ModuleType | None:
+    """Import bin/df_room_vits_generate.py so calls can skip the shell wrapper."""
+    if not Path(path).is_file():
+        return None
+
+    spec = importlib.util.spec_from_file_location("df_room_vits_generate", path)
+    if spec is None or spec.loader is None:
+        return None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_playback_url(base_url: str, output_path: Path) -> str:
+    """URL of an output under ALLOWED_DIR, keeping any subdirectories."""
+    relative = output_path.relative_to(ALLOWED_DIR).as_posix()
+    return f"{base_url.rstrip('/')}/{quote(relative)}"
+
+
+def prepare_request(
+    generator: ModuleType | None, text: str, lang: str, speaker: str
+) -> tuple[str, str, str]:
+    """Normalize and sanitize HA scalars in-process, like the shell wrapper does."""
+    if generator is None:
+        return text, lang, speaker
+
+    try:
+        return generator.normalize_request(text, lang, speaker)
+    except ValueError as error:
+        raise HomeAssistantError(str(error)) from error
+
+
+def build_synthesis_command(
+    generator: ModuleType | None,
+    text: str,
+    lang: str,
+    speaker: str,
+    output: str,
+    *,
+    low_priority: bool = False,
+) -> list[str]:
+    if generator is None:
+        command = [WRAPPER_PATH, text, lang, speaker, output]
+    else:
+        command = generator.build_command(
+            binary_path=VITS_BIN_PATH,
+            raw_message=text,
+            lang=lang,
+            speaker=speaker,
+            output_path=output,
+        )
+    if low_priority:
+        command = ["nice", "-n", "19", *command]
+    return command
+
+
+async def async_run_synthesis(
+    command: list[str], output: str, *, timer: RequestTimer | None = None
+) -> dict[str, object]:
+    """Run vits-tts (or the wrapper) as a child killed when the job is cancelled."""
+    timer = timer or RequestTimer()
+    with timer.stage("spawn"):
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    with timer.stage("synthesis"):
+        try:
+            raw_stdout, raw_stderr = await asyncio.wait_for(
+                process.communicate(), timeout=WRAPPER_TIMEOUT
+            )
+        except (asyncio.CancelledError, asyncio.TimeoutError) as error:
+            if process.returncode is None:
+                process.kill()
+                _ = await process.wait()
+            if isinstance(error, asyncio.TimeoutError):
+                raise HomeAssistantError(
+                    f"vits generation timed out after {WRAPPER_TIMEOUT}s"
+                ) from error
+            raise
+
+    stdout = raw_stdout.decode("utf-8", errors="replace")
+    stderr = raw_stderr.decode("utf-8", errors="replace")
+    if process.returncode != 0:
+        raise HomeAssistantError(
+            stderr.strip() or stdout.strip() or "vits generation failed"
+        )
+
+    output_path = Path(output)
+    with timer.stage("verify"):
+        if not output_path.exists():
+            raise HomeAssistantError("output file missing")
+        if output_path.stat().st_size == 0:
+            raise HomeAssistantError("output file empty")
+
+    return {
+        "returncode": process.returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "output": output,
+    }
+
+
+def load_configured_phrases(entries: list[object]) -> list[Phrase]:
+    phrases: list[Phrase] = []
+    for entry in entries:
+        if isinstance(entry, str):
+            phrases.append(Phrase(text=entry.strip()))
+        elif isinstance(entry, dict):
+            phrases.append(
+                Phrase(
+                    text=str(entry["text"]).strip(),
+                    lang=str(entry.get("lang", "zh")).strip() or "zh",
+                    speaker=str(entry.get("speaker", "")).strip(),
+                )
+            )
+    return [phrase for phrase in phrases if phrase.text]
+
+
+def load_script_phrases(hass: HomeAssistant) -> list[Phrase]:
+    from homeassistant.util.yaml import load_yaml
+
+    phrases: list[Phrase] = []
+    for filename in PRERENDER_SOURCES:
+        path = Path(hass.config.path(filename))
+        if not path.exists():
+            continue
+        try:
+            document = load_yaml(str(path))
+        except HomeAssistantError as error:
+            _LOGGER.warning("Skipping %s for pre-render discovery: %s", path, error)
+            continue
+        phrases.extend(
+            phrase for phrase in discover_phrases(document) if phrase not in phrases
+        )
+    return phrases
+
+
+async def async_prerender(
+    cache: PhraseCache,
+    scheduler: JobScheduler,
+    generator: ModuleType | None,
+    phrases: list[Phrase],
+) -> None:
+    rendered = 0
+    for phrase in phrases:
+        try:
+            text, lang, speaker = prepare_request(
+                generator, phrase.text, phrase.lang, phrase.speaker
+            )
+        except HomeAssistantError as error:
+            _LOGGER.warning("Skipping pre-render of %r: %s", phrase.text, error)
+            continue
+        key = cache_key(text, lang, speaker)
+        if await asyncio.to_thread(cache.lookup, key) is not None:
+            continue
+
+        staging = cache.staging_path_for(key)
+        command = build_synthesis_command(
+            generator, text, lang, speaker, str(staging), low_priority=True
+        )
+        await asyncio.to_thread(cache.directory.mkdir, parents=True, exist_ok=True)
+        try:
+            _ = await scheduler.submit(
+                PRIORITY_LOW, partial(async_run_synthesis, command, str(staging))
+            )
+            _ = await asyncio.to_thread(cache.promote, key, staging)
+        except (HomeAssistantError, OSError, QueueFullError) as error:
+            _LOGGER.warning("Pre-render failed for %r: %s", phrase.text, error)
+            await asyncio.to_thread(staging.unlink, missing_ok=True)
+            continue
+        rendered += 1
+
+    _LOGGER.info("Pre-rendered %d of %d known VITS phrases", rendered, len(phrases))
+
+
+def build_retention_policy(
+    retention_config: dict[str, Any], overrides: dict[str, Any] | None = None
+) -> RetentionPolicy:
+    merged = {**RETENTION_SCHEMA({}), **retention_config, **(overrides or {})}
+    return RetentionPolicy(
+        max_age=merged[CONF_MAX_AGE].total_seconds(),
+        max_files=merged[CONF_MAX_FILES],
+        max_bytes=merged[CONF_MAX_SIZE_MB] * 1024 * 1024,
+        min_age=merged[CONF_MIN_AGE].total_seconds(),
+        pattern=merged[CONF_PATTERN],
+    )
+
+
+def playing_outputs(hass: HomeAssistant) -> set[Path]:
+    protected: set[Path] = set()
+    for state in hass.states.async_all("media_player"):
+        if state.state not in PLAYING_STATES:
+            continue
+        content_id = state.attributes.get("media_content_id")
+        if isinstance(content_id, str) and "/vits/" in content_id:
+            protected.add(ALLOWED_DIR / PurePosixPath(content_id.split("?", 1)[0]).name)
+    return protected
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
-    async def handle_generate(call: ServiceCall) -> dict[str, object]:
-        text = str(call.data.get("text", ""))
-        lang = str(call.data.get("lang", "zh"))
-        speaker = str(call.data.get("speaker", ""))
-        output = str(call.data.get("output", ""))
+    domain_config = config.get(DOMAIN) or {}
+    prerender_config = domain_config.get(CONF_PRERENDER) or {}
+    retention_config = domain_config.get(CONF_RETENTION) or {}
+    cache = PhraseCache(CACHE_DIR)
+    active_outputs: set[Path] = set()
+    stats = LatencyStats()
+    scheduler_config = SCHEDULER_SCHEMA(domain_config.get(CONF_SCHEDULER) or {})
+    scheduler = JobScheduler(
+        concurrency=scheduler_config[CONF_CONCURRENCY],
+        max_queued=scheduler_config[CONF_MAX_QUEUED],
+        preempt=scheduler_config[CONF_PREEMPT],
+    )
+
+    async def discard_shared(result: dict[str, object]) -> None:
+        await asyncio.to_thread(Path(str(result["output"])).unlink, missing_ok=True)
+
+    coalescer: RequestCoalescer[dict[str, object]] = RequestCoalescer(discard_shared)
+    hass.data.setdefault(DOMAIN, {})[DATA_STATS] = stats
+    hass.data[DOMAIN][DATA_SCHEDULER] = scheduler
+
+    generator: ModuleType | None = None
+    if domain_config.get(CONF_IN_PROCESS, True):
+        generator_path = hass.config.path("bin", GENERATOR_FILENAME)
+        try:
+            generator = await asyncio.to_thread(load_generator, generator_path)
+        except Exception:  # noqa: BLE001 - fall back to the shell wrapper
+            _LOGGER.exception("Failed to import %s", generator_path)
+    if generator is None:
+        _LOGGER.info("Using shell wrapper %s for VITS generation", WRAPPER_PATH)
+
+    async def async_generate(data: Mapping[str, Any]) -> dict[str, object]:
+        timer = RequestTimer()
+        text = str(data.get("text", ""))
+        lang = str(data.get("lang", "zh"))
+        speaker = str(data.get("speaker", ""))
+        output = str(data.get("output", ""))
+        bitrate = str(data.get("bitrate", ""))
 
         output_path = Path(output)
-        if not output or not str(output_path).startswith(str(ALLOWED_DIR) + "/"):
+        if (
+            not output
+            or not str(output_path).startswith(str(ALLOWED_DIR) + "/")
+            or ".." in output_path.parts
+        ):
             raise HomeAssistantError(f"output path must stay under {ALLOWED_DIR}")
 
-        def run_wrapper() -> dict[str, object]:
-            import subprocess
+        try:
+            output_format = resolve_format(str(data.get("format", "wav")))
+        except ValueError as error:
+            raise HomeAssistantError(str(error)) from error
+
+        priority = str(data.get("priority") or PRIORITY_NORMAL)
+        if priority not in PRIORITIES:
+            raise HomeAssistantError(f"unknown priority: {priority}")
+
+        if output_format.name != "wav":
+            output_path = output_path.with_suffix(".wav")
+            output = str(output_path)
 
-            completed = subprocess.run(
-                [WRAPPER_PATH, text, lang, speaker, output],
-                check=False,
-                capture_output=True,
-                text=True,
-                timeout=55,
+        with timer.stage("sanitize"):
+            text, lang, speaker = prepare_request(generator, text, lang, speaker)
+            key = cache_key(text, lang, speaker)
+        claimed = {output_path, encoded_path(output_path, output_format)}
+        active_outputs.update(claimed)
+
+        async def render_shared() -> dict[str, object]:
+            shared_path = CACHE_DIR / f"{key}.{uuid4().hex}.inflight.wav"
+            await asyncio.to_thread(CACHE_DIR.mkdir, parents=True, exist_ok=True)
+            queued_from = timer.now()
+
+            command = build_synthesis_command(
+                generator, text, lang, speaker, str(shared_path)
             )
-            if completed.returncode != 0:
-                raise HomeAssistantError(
-                    completed.stderr.strip()
-                    or completed.stdout.strip()
-                    or "vits generation failed"
-                )
 
-            if not output_path.exists():
-                raise HomeAssistantError("output file missing")
-            if output_path.stat().st_size == 0:
-                raise HomeAssistantError("output file empty")
+            async def run() -> dict[str, object]:
+                # A preempted attempt is re-run from its lane: time each
+                # attempt separately so the killed run and the earlier wait
+                # are not counted again as queue_wait/spawn/synthesis.
+                nonlocal queued_from
+                timer.record("queue_wait", queued_from)
+                attempt = RequestTimer()
+                try:
+                    result = await async_run_synthesis(
+                        command, str(shared_path), timer=attempt
+                    )
+                except asyncio.CancelledError:
+                    timer.add("preempted", attempt.total_ms())
+                    queued_from = timer.now()
+                    raise
+                timer.merge(attempt)
+                return result
+
+            try:
+                result = await scheduler.submit(priority, run)
+            except BaseException:
+                await asyncio.to_thread(shared_path.unlink, missing_ok=True)
+                raise
+            if key in cache.known_keys:
+                _ = await asyncio.to_thread(cache.store, key, shared_path)
+            return result
+
+        async def synthesize() -> dict[str, object]:
+            with timer.stage("cache_lookup"):
+                cache_hit = await asyncio.to_thread(
+                    cache.materialize, key, output_path
+                )
+            if cache_hit:
+                return {
+                    "returncode": 0,
+                    "stdout": "",
+                    "stderr": "",
+                    "output": output,
+                    "cached": True,
+                    "coalesced": False,
+                }
 
+            waited_from = timer.now()
+            async with coalescer.join(f"{priority}:{key}", render_shared) as (
+                shared,
+                coalesced,
+            ):
+                if coalesced:
+                    timer.record("coalesced_wait", waited_from)
+                with timer.stage("copy"):
+                    _ = await asyncio.to_thread(
+                        shutil.copyfile, str(shared["output"]), output_path
+                    )
             return {
-                "returncode": completed.returncode,
-                "stdout": completed.stdout,
-                "stderr": completed.stderr,
+                **shared,
                 "output": output,
+                "cached": False,
+                "coalesced": coalesced,
             }
 
-        return await asyncio.to_thread(run_wrapper)
+        def encode() -> dict[str, object]:
+            try:
+                with timer.stage("encode"):
+                    return transcode(output_path, output_format, bitrate=bitrate)
+            except (OSError, RuntimeError, subprocess.TimeoutExpired) as error:
+                raise HomeAssistantError(f"audio encoding failed: {error}") from error
+
+        stats.request_started()
+        timings: dict[str, float] | None = None
+        try:
+            try:
+                result = await synthesize()
+            except QueueFullError as error:
+                raise HomeAssistantError(str(error)) from error
+            encoded = await asyncio.to_thread(encode)
+            timings = timer.as_dict()
+            return {**result, **encoded, "timings": timings}
+        finally:
+            active_outputs.difference_update(claimed)
+            stats.request_finished(timings)
+
+    async def handle_generate(call: ServiceCall) -> dict[str, object]:
+        return await async_generate(call.data)
 
     hass.services.async_register(
         DOMAIN, SERVICE_GENERATE, handle_generate, supports_response="only"
     )
+
+    playback_base_url = str(
+        domain_config.get(CONF_PLAYBACK_BASE_URL, DEFAULT_PLAYBACK_BASE_URL)
+    ).rstrip("/")
+    default_media_players = list(
+        domain_config.get(CONF_DEFAULT_MEDIA_PLAYERS, DEFAULT_MEDIA_PLAYERS)
+    )
+
+    async def call_each(
+        service: str, players: list[str], data: dict[str, object]
+    ) -> list[BaseException | None]:
+        return await asyncio.gather(
+            *(
+                hass.services.async_call(
+                    "media_player",
+                    service,
+                    {ATTR_ENTITY_ID: player, **data},
+                    blocking=True,
+                )
+                for player in players
+            ),
+            return_exceptions=True,
+        )
+
+    async def handle_broadcast(call: ServiceCall) -> dict[str, object]:
+        players = list(call.data.get("media_players") or default_media_players)
+        if not players:
+            raise HomeAssistantError("no media players to broadcast to")
+        output = call.data.get("output") or str(
+            ALLOWED_DIR / f"df-room-{call.context.id}.wav"
+        )
+        generated = await async_generate({**call.data, "output": output})
+
+        output_path = Path(str(generated["output"]))
+        claimed = {output_path}
+        active_outputs.update(claimed)
+        try:
+            playback_url = build_playback_url(playback_base_url, output_path)
+            volume = call.data.get("volume")
+            volume_errors: list[BaseException | None] = [None] * len(players)
+            if volume is not None:
+                volume_errors = await call_each(
+                    "volume_set", players, {"volume_level": volume}
+                )
+            play_errors = await call_each(
+                "play_media",
+                players,
+                {
+                    "media_content_id": playback_url,
+                    "media_content_type": generated["mime_type"],
+                },
+            )
+        finally:
+            active_outputs.difference_update(claimed)
+
+        playback: dict[str, str] = {}
+        for player, volume_error, play_error in zip(
+            players, volume_errors, play_errors
+        ):
+            if play_error is not None:
+                playback[player] = f"play_media failed: {play_error}"
+            elif volume_error is not None:
+                playback[player] = f"playing; volume_set failed: {volume_error}"
+            else:
+                playback[player] = "playing"
+            if play_error is not None or volume_error is not None:
+                _LOGGER.warning("VITS broadcast to %s: %s", player, playback[player])
+
+        if all(error is not None for error in play_errors):
+            raise HomeAssistantError(f"VITS playback failed on all players: {playback}")
+
+        return {**generated, "playback_url": playback_url, "playback": playback}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BROADCAST,
+        handle_broadcast,
+        schema=BROADCAST_SCHEMA,
+        supports_response="optional",
+    )
+
+    async def async_sweep(policy: RetentionPolicy) -> dict[str, int]:
+        protected = playing_outputs(hass) | active_outputs
+        result = await asyncio.to_thread(
+            sweep, ALLOWED_DIR, policy=policy, protected=protected
+        )
+        if result["deleted"]:
+            _LOGGER.info(
+                "Removed %d VITS outputs (%d bytes) from %s",
+                result["deleted"],
+                result["freed_bytes"],
+                ALLOWED_DIR,
+            )
+        # A live temporary is never older than one synthesis run.
+        stale = await asyncio.to_thread(
+            sweep_temporaries,
+            CACHE_DIR,
+            min_age=max(policy.min_age, 2 * WRAPPER_TIMEOUT),
+        )
+        if stale["deleted"]:
+            _LOGGER.info(
+                "Removed %d stale VITS temporaries (%d bytes) from %s",
+                stale["deleted"],
+                stale["freed_bytes"],
+                CACHE_DIR,
+            )
+        return {
+            **result,
+            "freed_bytes": result["freed_bytes"] + stale["freed_bytes"],
+            "stale_deleted": stale["deleted"],
+        }
+
+    async def handle_purge(call: ServiceCall) -> dict[str, object]:
+        policy = build_retention_policy(retention_config, dict(call.data))
+        return dict(await async_sweep(policy))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PURGE,
+        handle_purge,
+        schema=PURGE_SCHEMA,
+        supports_response="optional",
+    )
+
+    async def scheduled_sweep(_now: datetime) -> None:
+        _ = await async_sweep(build_retention_policy(retention_config))
+
+    _ = async_track_time_interval(
+        hass,
+        scheduled_sweep,
+        retention_config.get(CONF_SCAN_INTERVAL, timedelta(hours=1)),
+        name=f"{DOMAIN}_retention",
+        cancel_on_shutdown=True,
+    )
+
+    async def start_prerender(_event: Event) -> None:
+        phrases = load_configured_phrases(prerender_config.get(CONF_PHRASES, []))
+        if prerender_config.get(CONF_FROM_SCRIPTS, True):
+            for phrase in await asyncio.to_thread(load_script_phrases, hass):
+                if phrase not in phrases:
+                    phrases.append(phrase)
+        if not phrases:
+            return
+
+        for phrase in phrases:
+            try:
+                prepared = prepare_request(
+                    generator, phrase.text, phrase.lang, phrase.speaker
+                )
+            except HomeAssistantError:
+                continue
+            cache.known_keys.add(cache_key(*prepared))
+        await asyncio.sleep(prerender_config.get(CONF_START_DELAY, 30))
+        await async_prerender(cache, scheduler, generator, phrases)
+
+    @callback
+    def schedule_prerender(event: Event) -> None:
+        hass.async_create_background_task(
+            start_prerender(event), f"{DOMAIN}_prerender"
+        )
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, schedule_prerender)
+    hass.async_create_task(async_load_platform(hass, "sensor", DOMAIN, {}, config))
     return True
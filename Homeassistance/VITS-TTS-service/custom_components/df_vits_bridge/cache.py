@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+
+DEFAULT_LANG = "zh"
+DEFAULT_ZH_SPEAKER = "云堇"
+DEFAULT_JA_SPEAKER = "ayaka"
+
+
+def cache_key(text: str, lang: str, speaker: str) -> str:
+    resolved_lang = lang.strip() or DEFAULT_LANG
+    resolved_speaker = speaker.strip()
+    if not resolved_speaker:
+        resolved_speaker = (
+            DEFAULT_JA_SPEAKER if resolved_lang == "ja" else DEFAULT_ZH_SPEAKER
+        )
+
+    payload = "\0".join((text.strip(), resolved_lang, resolved_speaker))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PhraseCache:
+    """Pre-rendered WAV files keyed by normalized text/lang/speaker."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.known_keys: set[str] = set()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def lookup(self, key: str) -> Path | None:
+        path = self.path_for(key)
+        try:
+            if path.stat().st_size > 0:
+                return path
+        except FileNotFoundError:
+            return None
+        return None
+
+    def materialize(self, key: str, destination: Path) -> bool:
+        source = self.lookup(key)
+        if source is None:
+            return False
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        _ = shutil.copyfile(source, destination)
+        return True
+
+    def staging_path_for(self, key: str) -> Path:
+        return self.directory / f"{key}.partial.wav"
+
+    def promote(self, key: str, staging: Path) -> Path:
+        target = self.path_for(key)
+        os.replace(staging, target)
+        return target
+
+    def store(self, key: str, source: Path) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = self.staging_path_for(key)
+        _ = shutil.copyfile(source, staging)
+        return self.promote(key, staging)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class _Flight(Generic[_T]):
+    task: asyncio.Task[_T]
+    participants: int = 0
+
+
+class RequestCoalescer(Generic[_T]):
+    """Share one in-flight synthesis between concurrent callers of the same key.
+
+    The first caller for a key starts ``produce``; later callers await the same
+    task. The produced result stays valid until every participant has left the
+    ``join`` block, after which ``release`` disposes of it.
+    """
+
+    def __init__(self, release: Callable[[_T], Awaitable[None]]) -> None:
+        self._release = release
+        self._inflight: dict[str, _Flight[_T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    @asynccontextmanager
+    async def join(
+        self, key: str, produce: Callable[[], Awaitable[_T]]
+    ) -> AsyncIterator[tuple[_T, bool]]:
+        flight = self._inflight.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(task=asyncio.ensure_future(produce()))
+            self._inflight[key] = flight
+
+        flight.participants += 1
+        try:
+            result = await asyncio.shield(flight.task)
+            yield result, shared
+        finally:
+            flight.participants -= 1
+            if flight.participants == 0:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                await self._finish(flight)
+
+    async def _finish(self, flight: _Flight[_T]) -> None:
+        if not flight.task.done():
+            flight.task.add_done_callback(self._release_later)
+            return
+        if flight.task.cancelled() or flight.task.exception() is not None:
+            return
+        await self._release(flight.task.result())
+
+    def _release_later(self, task: asyncio.Task[_T]) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        _ = asyncio.ensure_future(self._release(task.result()))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+SCRIPT_ACTION = "script.df_room_say_vits"
+GENERATE_ACTION = "df_vits_bridge.generate"
+BROADCAST_ACTION = "df_vits_bridge.broadcast"
+TEXT_FIELDS = {
+    SCRIPT_ACTION: "message",
+    GENERATE_ACTION: "text",
+    BROADCAST_ACTION: "text",
+}
+TEMPLATE_MARKERS = ("{{", "{%", "{#")
+
+
+@dataclass(frozen=True)
+class Phrase:
+    text: str
+    lang: str = "zh"
+    speaker: str = ""
+
+
+def _is_literal(value: object) -> bool:
+    return isinstance(value, str) and not any(
+        marker in value for marker in TEMPLATE_MARKERS
+    )
+
+
+def _phrase_from_step(step: dict[object, object]) -> Phrase | None:
+    action = step.get("action", step.get("service"))
+    text_field = TEXT_FIELDS.get(action) if isinstance(action, str) else None
+    if text_field is None:
+        return None
+
+    data = step.get("data")
+    if not isinstance(data, dict):
+        return None
+
+    text = data.get(text_field)
+    lang = data.get("lang", "zh")
+    speaker = data.get("speaker", "")
+    if not (_is_literal(text) and _is_literal(lang) and _is_literal(speaker)):
+        return None
+
+    assert isinstance(text, str) and isinstance(lang, str) and isinstance(speaker, str)
+    if not text.strip():
+        return None
+
+    return Phrase(text=text.strip(), lang=lang.strip() or "zh", speaker=speaker.strip())
+
+
+def discover_phrases(document: object) -> list[Phrase]:
+    """Collect fixed-string VITS calls from a parsed scripts/automations tree."""
+    found: list[Phrase] = []
+    pending: list[object] = [document]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, dict):
+            phrase = _phrase_from_step(node)
+            if phrase is not None and phrase not in found:
+                found.append(phrase)
+            pending.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            pending.extend(reversed(node))
+
+    return found
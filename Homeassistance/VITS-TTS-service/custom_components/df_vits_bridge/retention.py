@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+DEFAULT_PATTERN = "df-room-*"
+TEMPORARY_PATTERNS = ("*.inflight.wav", "*.partial.wav")
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    max_age: float | None = None
+    max_files: int | None = None
+    max_bytes: int | None = None
+    min_age: float = 0.0
+    pattern: str = DEFAULT_PATTERN
+
+
+@dataclass(frozen=True)
+class OutputFile:
+    path: Path
+    mtime: float
+    size: int
+
+
+def scan_outputs(directory: Path, pattern: str = DEFAULT_PATTERN) -> list[OutputFile]:
+    """List per-run output files directly under ``directory``, oldest first."""
+    entries: list[OutputFile] = []
+    for path in directory.glob(pattern):
+        if path.name.startswith("."):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if not path.is_file():
+            continue
+        entries.append(OutputFile(path=path, mtime=stat.st_mtime, size=stat.st_size))
+
+    entries.sort(key=lambda entry: (entry.mtime, entry.path.name))
+    return entries
+
+
+def select_expired(
+    entries: list[OutputFile],
+    *,
+    policy: RetentionPolicy,
+    protected: set[Path],
+    now: float,
+) -> list[OutputFile]:
+    """Pick files to delete: expired by age first, then oldest until limits hold."""
+    candidates = [
+        entry
+        for entry in sorted(entries, key=lambda entry: (entry.mtime, entry.path.name))
+        if entry.path not in protected and now - entry.mtime >= policy.min_age
+    ]
+    selected: list[OutputFile] = []
+    if policy.max_age is not None:
+        selected = [entry for entry in candidates if now - entry.mtime > policy.max_age]
+    selected_paths = {entry.path for entry in selected}
+
+    remaining_files = len(entries) - len(selected)
+    remaining_bytes = sum(entry.size for entry in entries) - sum(
+        entry.size for entry in selected
+    )
+    for entry in candidates:
+        if entry.path in selected_paths:
+            continue
+        over_count = policy.max_files is not None and remaining_files > policy.max_files
+        over_size = policy.max_bytes is not None and remaining_bytes > policy.max_bytes
+        if not (over_count or over_size):
+            break
+        selected.append(entry)
+        remaining_files -= 1
+        remaining_bytes -= entry.size
+
+    return selected
+
+
+def sweep(
+    directory: Path,
+    *,
+    policy: RetentionPolicy,
+    protected: set[Path],
+    now: float | None = None,
+) -> dict[str, int]:
+    entries = scan_outputs(directory, policy.pattern)
+    expired = select_expired(
+        entries,
+        policy=policy,
+        protected=protected,
+        now=time.time() if now is None else now,
+    )
+
+    deleted = 0
+    freed_bytes = 0
+    for entry in expired:
+        try:
+            entry.path.unlink()
+        except FileNotFoundError:
+            continue
+        deleted += 1
+        freed_bytes += entry.size
+
+    return {
+        "scanned": len(entries),
+        "deleted": deleted,
+        "freed_bytes": freed_bytes,
+        "kept": len(entries) - deleted,
+    }
+
+
+def sweep_temporaries(
+    directory: Path, *, min_age: float, now: float | None = None
+) -> dict[str, int]:
+    """Delete synthesis temporaries older than ``min_age`` left by a crash or restart."""
+    now = time.time() if now is None else now
+    deleted = 0
+    freed_bytes = 0
+    for pattern in TEMPORARY_PATTERNS:
+        for entry in scan_outputs(directory, pattern):
+            if now - entry.mtime < min_age:
+                continue
+            try:
+                entry.path.unlink()
+            except FileNotFoundError:
+                continue
+            deleted += 1
+            freed_bytes += entry.size
+
+    return {"deleted": deleted, "freed_bytes": freed_bytes}
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+
+PRIORITY_URGENT = "urgent"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+PRIORITIES = (PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_LOW)
+
+
+class QueueFullError(Exception):
+    """Raised when a priority lane already holds its maximum number of jobs."""
+
+
+@dataclass(eq=False)
+class _Job:
+    priority: str
+    factory: Callable[[], Awaitable[Any]]
+    future: asyncio.Future[Any]
+    task: asyncio.Future[Any] | None = None
+    preempted: bool = False
+
+
+class JobScheduler:
+    """Strict-priority job lanes with per-lane concurrency and preemption.
+
+    Lanes are served in ``PRIORITIES`` order: a lane only starts jobs while
+    every more urgent lane is idle. Submitting a job cancels running jobs in
+    less urgent lanes (when ``preempt`` is set); those jobs go back to the
+    front of their lane and restart once the urgent work has drained.
+    ``max_queued`` bounds the jobs *waiting* in a lane; a job that can start
+    immediately is always admitted.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: Mapping[str, int],
+        max_queued: Mapping[str, int],
+        preempt: bool = True,
+    ) -> None:
+        self._concurrency = {priority: concurrency[priority] for priority in PRIORITIES}
+        self._max_queued = {priority: max_queued[priority] for priority in PRIORITIES}
+        self._preempt = preempt
+        self._queues: dict[str, deque[_Job]] = {
+            priority: deque() for priority in PRIORITIES
+        }
+        self._running: dict[str, set[_Job]] = {
+            priority: set() for priority in PRIORITIES
+        }
+        self._preemptions = {priority: 0 for priority in PRIORITIES}
+        self._listeners: list[Callable[[], None]] = []
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def running(self) -> int:
+        return sum(len(jobs) for jobs in self._running.values())
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        return {
+            priority: {
+                "queued": len(self._queues[priority]),
+                "running": len(self._running[priority]),
+                "preempted": self._preemptions[priority],
+            }
+            for priority in PRIORITIES
+        }
+
+    async def submit(
+        self, priority: str, factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        if priority not in self._queues:
+            raise ValueError(f"unknown priority: {priority}")
+        queue = self._queues[priority]
+        if not self._can_start(priority) and len(queue) >= self._max_queued[priority]:
+            raise QueueFullError(
+                f"VITS {priority} queue is full ({len(queue)} waiting)"
+            )
+
+        job = _Job(
+            priority=priority,
+            factory=factory,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        queue.append(job)
+        if self._preempt:
+            self._preempt_below(priority)
+        self._dispatch()
+
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            self._abandon(job)
+            raise
+
+    def _can_start(self, priority: str) -> bool:
+        """Whether a job submitted now would be dispatched without waiting."""
+        for higher in PRIORITIES[: PRIORITIES.index(priority)]:
+            if self._queues[higher] or self._running[higher]:
+                return False
+        return (
+            not self._queues[priority]
+            and len(self._running[priority]) < self._concurrency[priority]
+        )
+
+    def _preempt_below(self, priority: str) -> None:
+        for lower in PRIORITIES[PRIORITIES.index(priority) + 1 :]:
+            for job in self._running[lower]:
+                if job.task is not None and not job.preempted:
+                    job.preempted = True
+                    _ = job.task.cancel()
+
+    def _dispatch(self) -> None:
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            running = self._running[priority]
+            while queue and len(running) < self._concurrency[priority]:
+                job = queue.popleft()
+                running.add(job)
+                job.task = asyncio.ensure_future(job.factory())
+                job.task.add_done_callback(partial(self._finished, job))
+            if queue or running:
+                break
+        self._notify()
+
+    def _abandon(self, job: _Job) -> None:
+        if job in self._queues[job.priority]:
+            self._queues[job.priority].remove(job)
+            self._notify()
+        elif job.task is not None and not job.task.done():
+            job.preempted = False
+            _ = job.task.cancel()
+
+    def _finished(self, job: _Job, task: asyncio.Future[Any]) -> None:
+        self._running[job.priority].discard(job)
+        if task.cancelled():
+            if job.preempted and not job.future.done():
+                job.preempted = False
+                self._preemptions[job.priority] += 1
+                self._queues[job.priority].appendleft(job)
+            elif not job.future.done():
+                _ = job.future.cancel()
+        elif not job.future.done():
+            error = task.exception()
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(task.result())
+        self._dispatch()
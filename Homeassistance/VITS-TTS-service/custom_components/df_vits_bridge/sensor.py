@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+
+from . import DATA_SCHEDULER, DATA_STATS, DOMAIN
+from .scheduler import JobScheduler
+from .stats import LatencyStats
+
+LATENCY_SENSORS = (
+    ("last_ms", "Last latency"),
+    ("p50_ms", "Latency p50"),
+    ("p95_ms", "Latency p95"),
+)
+COUNTER_SENSORS = (
+    ("in_flight", "In flight", SensorStateClass.MEASUREMENT),
+    ("failures", "Failures", SensorStateClass.TOTAL_INCREASING),
+)
+
+
+async def async_setup_platform(
+    hass: HomeAssistant,
+    config: ConfigType,
+    async_add_entities: AddEntitiesCallback,
+    discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    if discovery_info is None:
+        return
+
+    stats: LatencyStats = hass.data[DOMAIN][DATA_STATS]
+    entities: list[SensorEntity] = [
+        VitsStatsSensor(
+            stats,
+            key,
+            name,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            unit=UnitOfTime.MILLISECONDS,
+        )
+        for key, name in LATENCY_SENSORS
+    ]
+    entities.extend(
+        VitsStatsSensor(stats, key, name, state_class=state_class)
+        for key, name, state_class in COUNTER_SENSORS
+    )
+    scheduler: JobScheduler = hass.data[DOMAIN][DATA_SCHEDULER]
+    async_add_entities([*entities, VitsQueueSensor(scheduler)])
+
+
+class VitsStatsSensor(SensorEntity):
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        stats: LatencyStats,
+        key: str,
+        name: str,
+        *,
+        device_class: SensorDeviceClass | None = None,
+        state_class: SensorStateClass | None = None,
+        unit: str | None = None,
+    ) -> None:
+        self._stats = stats
+        self._key = key
+        self._attr_name = f"DF VITS {name}"
+        self._attr_unique_id = f"{DOMAIN}_{key}"
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_native_unit_of_measurement = unit
+
+    @property
+    def native_value(self) -> float | int | None:
+        value = self._stats.snapshot()[self._key]
+        return round(value, 1) if isinstance(value, float) else value
+
+    @property
+    def extra_state_attributes(self) -> dict[str, object] | None:
+        if self._key != "last_ms":
+            return None
+        return dict(self._stats.last_timings)
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(self._stats.add_listener(self._handle_update))
+
+    @callback
+    def _handle_update(self) -> None:
+        self.async_write_ha_state()
+
+
+class VitsQueueSensor(SensorEntity):
+    """Jobs waiting in the scheduler, with per-lane queued/running/preempted counts."""
+
+    _attr_should_poll = False
+    _attr_name = "DF VITS Queue depth"
+    _attr_unique_id = f"{DOMAIN}_queue_depth"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, scheduler: JobScheduler) -> None:
+        self._scheduler = scheduler
+
+    @property
+    def native_value(self) -> int:
+        return self._scheduler.queued()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, object]:
+        return {
+            "running": self._scheduler.running(),
+            "lanes": self._scheduler.snapshot(),
+        }
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(self._scheduler.add_listener(self._handle_update))
+
+    @callback
+    def _handle_update(self) -> None:
+        self.async_write_ha_state()
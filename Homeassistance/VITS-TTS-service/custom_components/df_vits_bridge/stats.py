@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+
+DEFAULT_WINDOW = 100
+
+
+class RequestTimer:
+    """Wall-clock milliseconds spent in each stage of one generate call."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self._clock = clock
+        self._started = clock()
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    def record(self, name: str, started: float) -> None:
+        self.add(name, (self._clock() - started) * 1000)
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+
+    def merge(self, other: RequestTimer) -> None:
+        for name, elapsed_ms in other.stages.items():
+            self.add(name, elapsed_ms)
+
+    def now(self) -> float:
+        return self._clock()
+
+    def total_ms(self) -> float:
+        return (self._clock() - self._started) * 1000
+
+    def as_dict(self) -> dict[str, float]:
+        timings = {f"{name}_ms": round(value, 1) for name, value in self.stages.items()}
+        timings["total_ms"] = round(self.total_ms(), 1)
+        return timings
+
+
+def percentile(samples: list[float], fraction: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class LatencyStats:
+    """Rolling latency window plus counters backing the bridge sensors."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+        self.last_latency: float | None = None
+        self.last_timings: dict[str, float] = {}
+        self.failures = 0
+        self.in_flight = 0
+        self._listeners: list[Callable[[], None]] = []
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+        self._notify()
+
+    def request_finished(self, timings: dict[str, float] | None) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+        if timings is None:
+            self.failures += 1
+        else:
+            self.last_timings = timings
+            self.last_latency = timings["total_ms"]
+            self.samples.append(timings["total_ms"])
+        self._notify()
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        samples = list(self.samples)
+        return {
+            "last_ms": self.last_latency,
+            "p50_ms": percentile(samples, 0.50),
+            "p95_ms": percentile(samples, 0.95),
+            "in_flight": self.in_flight,
+            "failures": self.failures,
+            "samples": len(samples),
+        }
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+
+FFMPEG_PATH = "ffmpeg"
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    name: str
+    suffix: str
+    mime_type: str
+    codec_args: tuple[str, ...] = ()
+    default_bitrate: str = ""
+
+
+OUTPUT_FORMATS = {
+    "wav": OutputFormat(name="wav", suffix=".wav", mime_type="audio/x-wav"),
+    "opus": OutputFormat(
+        name="opus",
+        suffix=".ogg",
+        mime_type="audio/ogg",
+        codec_args=("-c:a", "libopus", "-application", "voip"),
+        default_bitrate="32k",
+    ),
+    "mp3": OutputFormat(
+        name="mp3",
+        suffix=".mp3",
+        mime_type="audio/mpeg",
+        codec_args=("-c:a", "libmp3lame"),
+        default_bitrate="64k",
+    ),
+}
+
+
+def resolve_format(name: str) -> OutputFormat:
+    candidate = name.strip().lower() if name else ""
+    try:
+        return OUTPUT_FORMATS[candidate or "wav"]
+    except KeyError:
+        raise ValueError(f"unsupported output format: {name}") from None
+
+
+def encoded_path(wav_path: Path, output_format: OutputFormat) -> Path:
+    return wav_path.with_suffix(output_format.suffix)
+
+
+def build_transcode_command(
+    *,
+    ffmpeg_path: str,
+    input_path: str,
+    output_path: str,
+    output_format: OutputFormat,
+    bitrate: str = "",
+) -> list[str]:
+    return [
+        ffmpeg_path,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        input_path,
+        *output_format.codec_args,
+        "-b:a",
+        bitrate or output_format.default_bitrate,
+        output_path,
+    ]
+
+
+def transcode(
+    wav_path: Path,
+    output_format: OutputFormat,
+    *,
+    bitrate: str = "",
+    ffmpeg_path: str = FFMPEG_PATH,
+    keep_wav: bool = False,
+) -> dict[str, object]:
+    """Encode ``wav_path`` and report the resulting path, mime type and size change."""
+    wav_bytes = wav_path.stat().st_size
+    if output_format.name == "wav":
+        return {
+            "output": str(wav_path),
+            "format": output_format.name,
+            "mime_type": output_format.mime_type,
+            "wav_bytes": wav_bytes,
+            "output_bytes": wav_bytes,
+            "size_reduction": 0.0,
+        }
+
+    target = encoded_path(wav_path, output_format)
+    completed = subprocess.run(
+        build_transcode_command(
+            ffmpeg_path=ffmpeg_path,
+            input_path=str(wav_path),
+            output_path=str(target),
+            output_format=output_format,
+            bitrate=bitrate,
+        ),
+        check=False,
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    if completed.returncode != 0 or not target.exists() or target.stat().st_size == 0:
+        raise RuntimeError(
+            completed.stderr.strip() or f"{output_format.name} encoding failed"
+        )
+
+    output_bytes = target.stat().st_size
+    if not keep_wav:
+        wav_path.unlink(missing_ok=True)
+
+    return {
+        "output": str(target),
+        "format": output_format.name,
+        "mime_type": output_format.mime_type,
+        "wav_bytes": wav_bytes,
+        "output_bytes": output_bytes,
+        "size_reduction": round(1 - output_bytes / wav_bytes, 4) if wav_bytes else 0.0,
+    }
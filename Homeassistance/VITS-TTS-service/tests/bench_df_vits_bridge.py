@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""Offline load test for df_vits_bridge.generate.
+
+Drives the real ``handle_generate`` service handler through a stub
+``HomeAssistant``/``ServiceCall`` and a fake ``vits-tts`` that sleeps for a
+configurable delay before writing a fixed-size WAV, then reports throughput,
+latency percentiles, executor thread usage and file I/O cost per concurrency
+level. Requires the ``homeassistant`` package (for ``voluptuous`` and the
+config validation helpers); no running Home Assistant instance is needed.
+
+    python tests/bench_df_vits_bridge.py --levels 1,5,10,25,50 --delay 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any, cast
+
+from component_loader import load_component, load_module
+
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+STATS = load_module("stats")
+IO_STAGES = ("cache_lookup_ms", "copy_ms", "verify_ms", "encode_ms")
+FAKE_VITS = """#!/bin/sh
+out=""
+while [ "$#" -gt 0 ]; do
+    if [ "$1" = "-o" ]; then
+        out=$2
+        shift
+    fi
+    shift
+done
+sleep "$FAKE_VITS_DELAY"
+head -c "$FAKE_VITS_BYTES" /dev/zero > "$out"
+"""
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Default-executor replacement that records job count and peak busy threads."""
+
+    def __init__(self, max_workers: int) -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix="bench")
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.busy = 0
+        self.peak_busy = 0
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any):  # type: ignore[override]
+        def tracked() -> Any:
+            with self._lock:
+                self.busy += 1
+                self.peak_busy = max(self.peak_busy, self.busy)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+        with self._lock:
+            self.jobs += 1
+        return super().submit(tracked)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.jobs = 0
+            self.peak_busy = self.busy
+
+
+@dataclass
+class StubContext:
+    id: str
+
+
+@dataclass
+class StubServiceCall:
+    domain: str
+    service: str
+    data: dict[str, Any]
+    context: StubContext
+
+
+@dataclass
+class StubConfig:
+    config_dir: Path
+
+    def path(self, *parts: str) -> str:
+        return str(self.config_dir.joinpath(*parts))
+
+
+class StubServices:
+    def __init__(self) -> None:
+        self.handlers: dict[tuple[str, str], Callable[[Any], Awaitable[Any]]] = {}
+        self.calls: list[tuple[str, str, dict[str, Any]]] = []
+
+    def async_register(
+        self,
+        domain: str,
+        service: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        schema: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+        supports_response: object = None,
+    ) -> None:
+        self.handlers[(domain, service)] = handler
+
+    async def async_call(
+        self,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        blocking: bool = False,
+    ) -> None:
+        self.calls.append((domain, service, data))
+
+
+class StubBus:
+    def async_listen_once(self, event_type: str, listener: Callable[..., Any]) -> None:
+        return None
+
+
+class StubStates:
+    def async_all(self, domain: str | None = None) -> list[Any]:
+        return []
+
+
+class StubHomeAssistant:
+    """Just enough of ``HomeAssistant`` for ``async_setup`` and the services."""
+
+    def __init__(self, config_dir: Path) -> None:
+        self.config = StubConfig(config_dir)
+        self.services = StubServices()
+        self.bus = StubBus()
+        self.states = StubStates()
+        self.data: dict[str, Any] = {}
+        self._tasks: set[asyncio.Future[Any]] = set()
+
+    def async_create_task(self, target: Awaitable[Any], name: str | None = None):
+        task = asyncio.ensure_future(target)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async_create_background_task = async_create_task
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    requests: int
+    failures: int
+    elapsed_s: float
+    latencies_ms: list[float] = field(repr=False)
+    io_ms: list[float] = field(repr=False)
+    executor_jobs: int
+    peak_executor_threads: int
+
+    def summary(self) -> dict[str, float | int | None]:
+        ok = len(self.latencies_ms)
+        return {
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "failures": self.failures,
+            "throughput_rps": round(ok / self.elapsed_s, 2) if self.elapsed_s else None,
+            "p50_ms": rounded(STATS.percentile(self.latencies_ms, 0.50)),
+            "p99_ms": rounded(STATS.percentile(self.latencies_ms, 0.99)),
+            "executor_jobs_per_request": round(self.executor_jobs / self.requests, 2),
+            "peak_executor_threads": self.peak_executor_threads,
+            "io_ms_per_request": round(sum(self.io_ms) / ok, 2) if ok else None,
+        }
+
+
+def rounded(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
+
+
+def install_fake_synthesizer(root: Path) -> Path:
+    binary = root / "bin" / "fake-vits-tts"
+    binary.parent.mkdir(parents=True, exist_ok=True)
+    _ = binary.write_text(FAKE_VITS, encoding="utf-8")
+    binary.chmod(0o755)
+    generator = SERVICE_ROOT / "bin" / "df_room_vits_generate.py"
+    _ = (root / "bin" / generator.name).write_bytes(generator.read_bytes())
+    return binary
+
+
+async def setup_bridge(
+    component: ModuleType, root: Path, domain_config: dict[str, Any]
+) -> StubHomeAssistant:
+    media_dir = root / "media" / "vits"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    component.ALLOWED_DIR = media_dir
+    component.CACHE_DIR = media_dir / ".cache"
+    component.VITS_BIN_PATH = str(install_fake_synthesizer(root))
+    component.async_track_time_interval = lambda *args, **kwargs: lambda: None
+    component.async_load_platform = lambda *args, **kwargs: asyncio.sleep(0)
+
+    hass = StubHomeAssistant(root)
+    config = component.CONFIG_SCHEMA({component.DOMAIN: domain_config})
+    assert await component.async_setup(hass, config)
+    return hass
+
+
+async def run_level(
+    hass: StubHomeAssistant,
+    executor: CountingExecutor,
+    *,
+    concurrency: int,
+    requests: int,
+    identical: bool,
+    output_format: str,
+) -> LevelResult:
+    handler = hass.services.handlers[("df_vits_bridge", "generate")]
+    media_dir = Path(hass.config.path("media", "vits"))
+    gate = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    io_costs: list[float] = []
+    failures = 0
+
+    async def one(index: int) -> None:
+        nonlocal failures
+        text = "門已開啟" if identical else f"第 {concurrency}-{index} 則測試廣播"
+        call = StubServiceCall(
+            domain="df_vits_bridge",
+            service="generate",
+            data={
+                "text": text,
+                "lang": "zh",
+                "speaker": "",
+                "output": str(media_dir / f"df-room-bench-{concurrency}-{index}.wav"),
+                "format": output_format,
+            },
+            context=StubContext(id=f"bench-{concurrency}-{index}"),
+        )
+        async with gate:
+            started = time.perf_counter()
+            try:
+                response = await handler(call)
+            except Exception:  # noqa: BLE001 - counted, not raised
+                failures += 1
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+            timings = cast(dict[str, float], response["timings"])
+            io_costs.append(sum(timings.get(stage, 0.0) for stage in IO_STAGES))
+
+    executor.reset()
+    started = time.perf_counter()
+    _ = await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    return LevelResult(
+        concurrency=concurrency,
+        requests=requests,
+        failures=failures,
+        elapsed_s=elapsed,
+        latencies_ms=latencies,
+        io_ms=io_costs,
+        executor_jobs=executor.jobs,
+        peak_executor_threads=executor.peak_busy,
+    )
+
+
+async def run_benchmark(args: argparse.Namespace) -> list[dict[str, float | int | None]]:
+    os.environ["FAKE_VITS_DELAY"] = str(args.delay)
+    os.environ["FAKE_VITS_BYTES"] = str(args.bytes)
+    executor = CountingExecutor(max_workers=args.executor_threads)
+    asyncio.get_running_loop().set_default_executor(executor)
+
+    component = load_component()
+    results: list[dict[str, float | int | None]] = []
+    with tempfile.TemporaryDirectory(prefix="df-vits-bench-") as temp_dir:
+        hass = await setup_bridge(
+            component,
+            Path(temp_dir),
+            {
+                "scheduler": {
+                    "concurrency": {"normal": args.workers},
+                    "max_queued": {"normal": max(args.levels) * args.per_level},
+                }
+            },
+        )
+        for level in args.levels:
+            result = await run_level(
+                hass,
+                executor,
+                concurrency=level,
+                requests=max(level * args.per_level, 1),
+                identical=args.identical,
+                output_format=args.format,
+            )
+            results.append(result.summary())
+    executor.shutdown(wait=True)
+    return results
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    _ = parser.add_argument(
+        "--levels",
+        default="1,5,10,25,50",
+        type=lambda value: [int(level) for level in value.split(",") if level],
+        help="Comma-separated client concurrency levels",
+    )
+    _ = parser.add_argument(
+        "--per-level", type=int, default=4, help="Requests per concurrent client"
+    )
+    _ = parser.add_argument(
+        "--delay", type=float, default=0.2, help="Fake synthesis time in seconds"
+    )
+    _ = parser.add_argument(
+        "--bytes", type=int, default=200_000, help="Fake WAV size in bytes"
+    )
+    _ = parser.add_argument(
+        "--workers", type=int, default=1, help="Scheduler concurrency for 'normal'"
+    )
+    _ = parser.add_argument(
+        "--executor-threads", type=int, default=32, help="Default executor size"
+    )
+    _ = parser.add_argument(
+        "--format", default="wav", choices=("wav", "opus", "mp3"), help="Output format"
+    )
+    _ = parser.add_argument(
+        "--identical",
+        action="store_true",
+        help="Send the same text for every request to exercise coalescing",
+    )
+    _ = parser.add_argument("--json", action="store_true", help="Print JSON lines")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run_benchmark(args))
+
+    if args.json:
+        for row in results:
+            print(json.dumps(row))
+        return 0
+
+    columns = list(results[0]) if results else []
+    widths = {
+        column: max(len(column), *(len(str(row[column])) for row in results))
+        for column in columns
+    }
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in results:
+        print("  ".join(str(row[column]).rjust(widths[column]) for column in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+COMPONENT_DIR = SERVICE_ROOT / "custom_components" / "df_vits_bridge"
+
+
+def load_path(module_name: str, path: Path) -> ModuleType:
+    """Load a standalone Python file as ``module_name``, reusing an earlier load."""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_module(name: str) -> ModuleType:
+    """Load one HA-free helper module of the bridge without importing the package."""
+    return load_path(f"df_vits_bridge_{name}", COMPONENT_DIR / f"{name}.py")
+
+
+def load_component() -> ModuleType:
+    """Import the whole integration package; needs ``homeassistant`` installed."""
+    if str(SERVICE_ROOT) not in sys.path:
+        sys.path.insert(0, str(SERVICE_ROOT))
+    return importlib.import_module("custom_components.df_vits_bridge")
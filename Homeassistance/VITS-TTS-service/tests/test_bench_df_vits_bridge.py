@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from component_loader import load_path
+
+
+BENCH = load_path(
+    "df_vits_bridge_bench", Path(__file__).resolve().with_name("bench_df_vits_bridge.py")
+)
+
+
+def test_level_summary_reports_throughput_percentiles_and_io() -> None:
+    result = BENCH.LevelResult(
+        concurrency=2,
+        requests=4,
+        failures=0,
+        elapsed_s=2.0,
+        latencies_ms=[100.0, 200.0, 300.0, 400.0],
+        io_ms=[1.0, 2.0, 3.0, 2.0],
+        executor_jobs=12,
+        peak_executor_threads=2,
+    )
+
+    assert result.summary() == {
+        "concurrency": 2,
+        "requests": 4,
+        "failures": 0,
+        "throughput_rps": 2.0,
+        "p50_ms": 200.0,
+        "p99_ms": 400.0,
+        "executor_jobs_per_request": 3.0,
+        "peak_executor_threads": 2,
+        "io_ms_per_request": 2.0,
+    }
+
+
+def test_benchmark_runs_generate_end_to_end_with_fake_synthesizer() -> None:
+    _ = pytest.importorskip("homeassistant")
+    args = BENCH.parse_args(["--levels", "1,3", "--per-level", "1", "--delay", "0.01"])
+
+    results = BENCH.asyncio.run(BENCH.run_benchmark(args))
+
+    assert [row["concurrency"] for row in results] == [1, 3]
+    assert all(row["failures"] == 0 for row in results)
+    assert all(row["executor_jobs_per_request"] for row in results)
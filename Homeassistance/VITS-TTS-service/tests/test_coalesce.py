@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+
+from component_loader import load_module
+
+
+COALESCE = load_module("coalesce")
+
+
+def test_concurrent_callers_share_one_synthesis_and_release_once() -> None:
+    produced: list[str] = []
+    released: list[str] = []
+
+    async def release(result: str) -> None:
+        released.append(result)
+
+    async def scenario() -> list[tuple[str, bool]]:
+        coalescer = COALESCE.RequestCoalescer(release)
+
+        async def produce() -> str:
+            produced.append("run")
+            await asyncio.sleep(0.01)
+            return "/media/vits/.cache/shared.wav"
+
+        async def caller() -> tuple[str, bool]:
+            async with coalescer.join("door-open", produce) as (result, shared):
+                await asyncio.sleep(0)
+                assert released == []
+                return result, shared
+
+        outcomes = await asyncio.gather(caller(), caller(), caller())
+        assert len(coalescer) == 0
+        return list(outcomes)
+
+    outcomes = asyncio.run(scenario())
+
+    assert produced == ["run"]
+    assert released == ["/media/vits/.cache/shared.wav"]
+    assert [shared for _, shared in outcomes] == [False, True, True]
+
+
+def test_failed_synthesis_propagates_to_every_caller_and_is_not_reused() -> None:
+    attempts: list[int] = []
+
+    async def release(result: str) -> None:
+        raise AssertionError("failed results must not be released")
+
+    async def scenario() -> list[object]:
+        coalescer = COALESCE.RequestCoalescer(release)
+
+        async def produce() -> str:
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("vits generation failed")
+
+        async def caller() -> str:
+            async with coalescer.join("door-open", produce) as (result, _shared):
+                return result
+
+        first = await asyncio.gather(caller(), caller(), return_exceptions=True)
+        second = await asyncio.gather(caller(), return_exceptions=True)
+        return [*first, *second]
+
+    outcomes = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert len(attempts) == 2
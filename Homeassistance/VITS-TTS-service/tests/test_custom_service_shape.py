@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import pytest
+
+from component_loader import load_component
+
 
 SCRIPTS_PATH = Path(__file__).resolve().parents[1] / "scripts.yaml"
 CONFIGURATION_PATH = Path(__file__).resolve().parents[1] / "configuration.yaml"
@@ -19,10 +23,10 @@ def test_configuration_enables_df_vits_bridge() -> None:
     assert "df_vits_bridge:" in content
 
 
-def test_vits_script_calls_custom_generation_service() -> None:
+def test_vits_script_calls_custom_broadcast_service() -> None:
     content = SCRIPTS_PATH.read_text(encoding="utf-8")
 
-    assert "action: df_vits_bridge.generate" in content
+    assert "action: df_vits_bridge.broadcast" in content
     assert "response_variable: shell_response" in content
 
 
@@ -32,3 +36,34 @@ def test_custom_component_registers_generate_service() -> None:
     assert "async_register" in content
     assert 'DOMAIN = "df_vits_bridge"' in content
     assert '"generate"' in content
+
+
+def test_custom_component_registers_broadcast_service() -> None:
+    content = COMPONENT_PATH.read_text(encoding="utf-8")
+
+    assert 'SERVICE_BROADCAST = "broadcast"' in content
+    assert "asyncio.gather(" in content
+    assert "192.168.11.201:8123/media/local/vits/" in content
+
+
+def test_custom_component_execs_vits_binary_in_process() -> None:
+    content = COMPONENT_PATH.read_text(encoding="utf-8")
+
+    assert 'GENERATOR_FILENAME = "df_room_vits_generate.py"' in content
+    assert "generator.build_command(" in content
+    assert "generator.normalize_request(" in content
+
+
+def test_broadcast_playback_url_keeps_output_subdirectories() -> None:
+    _ = pytest.importorskip("homeassistant")
+    component = load_component()
+    base = "http://ha.local:8123/media/local/vits/"
+
+    assert (
+        component.build_playback_url(base, component.ALLOWED_DIR / "df-room-1.ogg")
+        == "http://ha.local:8123/media/local/vits/df-room-1.ogg"
+    )
+    assert (
+        component.build_playback_url(base, component.ALLOWED_DIR / "rooms" / "x y.wav")
+        == "http://ha.local:8123/media/local/vits/rooms/x%20y.wav"
+    )
@@ -16,6 +16,15 @@ class GeneratorModule(Protocol):
         output_path: str,
     ) -> list[str]: ...
 
+    def build_transcode_command(
+        self,
+        *,
+        ffmpeg_path: str,
+        input_path: str,
+        output_format: str,
+        bitrate: str = "",
+    ) -> list[str]: ...
+
 
 MODULE_PATH = Path(__file__).resolve().parents[1] / "bin" / "df_room_vits_generate.py"
 SPEC = importlib.util.spec_from_file_location("df_room_vits_generate", MODULE_PATH)
@@ -87,3 +96,28 @@ def test_build_command_rejects_empty_message_after_sanitization() -> None:
         assert str(error) == "message is empty after sanitization"
     else:
         raise AssertionError("expected ValueError for empty sanitized message")
+
+
+def test_build_transcode_command_targets_opus_sibling_file() -> None:
+    command = MODULE.build_transcode_command(
+        ffmpeg_path="ffmpeg",
+        input_path="/media/vits/df-room-1.wav",
+        output_format="opus",
+    )
+
+    assert command[-1] == "/media/vits/df-room-1.ogg"
+    assert command[command.index("-c:a") + 1] == "libopus"
+    assert command[command.index("-b:a") + 1] == "32k"
+
+
+def test_build_transcode_command_rejects_unknown_format() -> None:
+    try:
+        _ = MODULE.build_transcode_command(
+            ffmpeg_path="ffmpeg",
+            input_path="/tmp/out.wav",
+            output_format="flac",
+        )
+    except ValueError as error:
+        assert str(error) == "unsupported output format: flac"
+    else:
+        raise AssertionError("expected ValueError for unsupported format")
@@ -1,11 +1,35 @@
 from __future__ import annotations
 
+import importlib.util
 import os
 import subprocess
 from pathlib import Path
+from typing import Protocol, cast
+
+
+class GeneratorModule(Protocol):
+    def normalize_request(
+        self, raw_message: str, lang: str, speaker: str
+    ) -> tuple[str, str, str]: ...
+
+    def build_command(
+        self,
+        *,
+        binary_path: str,
+        raw_message: str,
+        lang: str,
+        speaker: str,
+        output_path: str,
+    ) -> list[str]: ...
 
 
 SCRIPT_PATH = Path(__file__).resolve().parents[1] / "bin" / "df-room-vits-generate.sh"
+MODULE_PATH = Path(__file__).resolve().parents[1] / "bin" / "df_room_vits_generate.py"
+SPEC = importlib.util.spec_from_file_location("df_room_vits_generate", MODULE_PATH)
+assert SPEC is not None and SPEC.loader is not None
+RAW_MODULE = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(RAW_MODULE)
+MODULE = cast(GeneratorModule, cast(object, RAW_MODULE))
 
 
 def run_script(
@@ -37,16 +61,42 @@ def run_script(
     )
 
 
-def test_shell_wrapper_strips_metadata_and_mention(tmp_path: Path) -> None:
-    result = run_script(
+def in_process_args(
+    tmp_path: Path, message: str, lang: str, speaker: str, output: str = "out.wav"
+) -> list[str]:
+    # Same composition as the bridge: prepare_request() -> build_synthesis_command()
+    text, resolved_lang, resolved_speaker = MODULE.normalize_request(
+        message, lang, speaker
+    )
+    command = MODULE.build_command(
+        binary_path="vits-tts",
+        raw_message=text,
+        lang=resolved_lang,
+        speaker=resolved_speaker,
+        output_path=str(tmp_path / output),
+    )
+    assert command[0] == "vits-tts" and command[-1] == "-q"
+    return command[1:-1]
+
+
+def assert_parity(tmp_path: Path, message: str, lang: str, speaker: str) -> list[str]:
+    result = run_script(tmp_path, message, lang, speaker)
+
+    assert result.returncode == 0
+    captured = (tmp_path / "args.txt").read_text(encoding="utf-8").splitlines()
+    in_process = in_process_args(tmp_path, message, lang, speaker)
+    assert captured == "\n".join(in_process).splitlines()
+    return captured
+
+
+def test_wrapper_parity_strips_metadata_and_mention(tmp_path: Path) -> None:
+    captured = assert_parity(
         tmp_path,
         '<LILAC_META:v1>{"source":"discord"}</LILAC_META:v1>\n@df_chatbot\n今晚十點關燈',
         "zh",
         "",
     )
 
-    assert result.returncode == 0
-    captured = (tmp_path / "args.txt").read_text(encoding="utf-8").splitlines()
     assert captured == [
         "-t",
         "今晚十點關燈",
@@ -59,42 +109,43 @@ def test_shell_wrapper_strips_metadata_and_mention(tmp_path: Path) -> None:
     ]
 
 
-def test_shell_wrapper_keeps_explicit_speaker_for_mix(tmp_path: Path) -> None:
-    result = run_script(tmp_path, "今日は静かにして", "mix", "custom-voice")
+def test_wrapper_parity_keeps_explicit_speaker_for_mix(tmp_path: Path) -> None:
+    captured = assert_parity(tmp_path, "今日は静かにして", "mix", "custom-voice")
 
-    assert result.returncode == 0
-    captured = (tmp_path / "args.txt").read_text(encoding="utf-8").splitlines()
     assert captured[3] == "custom-voice"
     assert captured[5] == "mix"
 
 
-def test_shell_wrapper_uses_japanese_default_speaker(tmp_path: Path) -> None:
-    result = run_script(tmp_path, "おはよう", "ja", "")
+def test_wrapper_parity_uses_japanese_default_speaker(tmp_path: Path) -> None:
+    captured = assert_parity(tmp_path, "おはよう", "ja", "")
 
-    assert result.returncode == 0
-    captured = (tmp_path / "args.txt").read_text(encoding="utf-8").splitlines()
     assert captured[3] == "ayaka"
 
 
-def test_shell_wrapper_rejects_empty_message_after_sanitization(tmp_path: Path) -> None:
-    result = run_script(
-        tmp_path, "<LILAC_META:v1>{}</LILAC_META:v1>\n@df_chatbot\n", "zh", ""
-    )
+def test_wrapper_parity_rejects_empty_message_after_sanitization(
+    tmp_path: Path,
+) -> None:
+    message = "<LILAC_META:v1>{}</LILAC_META:v1>\n@df_chatbot\n"
+    result = run_script(tmp_path, message, "zh", "")
 
     assert result.returncode == 2
     assert result.stderr.strip() == "message is empty after sanitization"
+    try:
+        _ = in_process_args(tmp_path, message, "zh", "")
+    except ValueError as error:
+        assert str(error) == result.stderr.strip()
+    else:
+        raise AssertionError("expected ValueError for empty sanitized message")
 
 
-def test_shell_wrapper_strips_json_quotes_from_ha_payload(tmp_path: Path) -> None:
-    result = run_script(
+def test_wrapper_parity_strips_json_quotes_from_ha_payload(tmp_path: Path) -> None:
+    captured = assert_parity(
         tmp_path,
         '"<LILAC_META:v1>{\\"source\\":\\"discord\\"}</LILAC_META:v1>\\n@df_chatbot\\n今晚十點關燈"',
         '"zh"',
         '""',
     )
 
-    assert result.returncode == 0
-    captured = (tmp_path / "args.txt").read_text(encoding="utf-8").splitlines()
     assert captured == [
         "-t",
         "今晚十點關燈",
@@ -107,7 +158,7 @@ def test_shell_wrapper_strips_json_quotes_from_ha_payload(tmp_path: Path) -> Non
     ]
 
 
-def test_shell_wrapper_accepts_environment_transport(tmp_path: Path) -> None:
+def test_wrapper_parity_accepts_environment_transport(tmp_path: Path) -> None:
     fake_binary = tmp_path / "fake-vits-env.sh"
     output_path = tmp_path / "env-out.wav"
     capture_path = tmp_path / "env-args.txt"
@@ -121,12 +172,11 @@ def test_shell_wrapper_accepts_environment_transport(tmp_path: Path) -> None:
     )
     fake_binary.chmod(0o755)
 
+    text = '"<LILAC_META:v1>{\\"source\\":\\"discord\\"}</LILAC_META:v1>\\n@df_chatbot\\n今晚十點關燈"'
     environment = os.environ.copy()
     environment["VITS_BIN"] = str(fake_binary)
     environment["CAPTURE_PATH"] = str(capture_path)
-    environment["VITS_TEXT"] = (
-        '"<LILAC_META:v1>{\\"source\\":\\"discord\\"}</LILAC_META:v1>\\n@df_chatbot\\n今晚十點關燈"'
-    )
+    environment["VITS_TEXT"] = text
     environment["VITS_LANG"] = '"zh"'
     environment["VITS_SPEAKER"] = '""'
     environment["VITS_OUTPUT"] = str(output_path)
@@ -141,6 +191,7 @@ def test_shell_wrapper_accepts_environment_transport(tmp_path: Path) -> None:
 
     assert result.returncode == 0
     captured = capture_path.read_text(encoding="utf-8").splitlines()
+    assert captured == in_process_args(tmp_path, text, '"zh"', '""', "env-out.wav")
     assert captured == [
         "-t",
         "今晚十點關燈",
@@ -153,16 +204,14 @@ def test_shell_wrapper_accepts_environment_transport(tmp_path: Path) -> None:
     ]
 
 
-def test_shell_wrapper_trims_whitespace_around_ha_scalars(tmp_path: Path) -> None:
-    result = run_script(
+def test_wrapper_parity_trims_whitespace_around_ha_scalars(tmp_path: Path) -> None:
+    captured = assert_parity(
         tmp_path,
         "  今天會下雨  ",
         "  ja  ",
         "  custom-voice  ",
     )
 
-    assert result.returncode == 0
-    captured = (tmp_path / "args.txt").read_text(encoding="utf-8").splitlines()
     assert captured == [
         "-t",
         "今天會下雨",
@@ -173,3 +222,15 @@ def test_shell_wrapper_trims_whitespace_around_ha_scalars(tmp_path: Path) -> Non
         "-o",
         str(tmp_path / "out.wav"),
     ]
+
+
+def test_wrapper_parity_drops_blank_lines_and_indentation(tmp_path: Path) -> None:
+    captured = assert_parity(tmp_path, "  第一行\n\n\t第二行  \n", "zh", "")
+
+    assert captured[1:3] == ["第一行", "第二行"]
+
+
+def test_wrapper_parity_expands_printf_escapes(tmp_path: Path) -> None:
+    captured = assert_parity(tmp_path, "A\\tB\\\\C\\cignored", "zh", "")
+
+    assert captured[1] == "A\tB\\C"
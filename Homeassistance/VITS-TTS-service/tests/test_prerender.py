@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from component_loader import load_module
+
+
+CACHE = load_module("cache")
+PRERENDER = load_module("prerender")
+
+
+def test_cache_key_matches_default_speaker_resolution() -> None:
+    assert CACHE.cache_key("門已開啟", "zh", "") == CACHE.cache_key(
+        "  門已開啟 ", "", "云堇"
+    )
+    assert CACHE.cache_key("おはよう", "ja", "") == CACHE.cache_key(
+        "おはよう", "ja", "ayaka"
+    )
+    assert CACHE.cache_key("門已開啟", "zh", "") != CACHE.cache_key(
+        "門已開啟", "mix", ""
+    )
+
+
+def test_phrase_cache_materializes_stored_audio(tmp_path: Path) -> None:
+    cache = CACHE.PhraseCache(tmp_path / ".cache")
+    key = CACHE.cache_key("門已開啟", "zh", "")
+    source = tmp_path / "rendered.wav"
+    _ = source.write_bytes(b"RIFF-data")
+
+    assert not cache.materialize(key, tmp_path / "miss.wav")
+
+    _ = cache.store(key, source)
+    destination = tmp_path / "df-room-run.wav"
+
+    assert cache.materialize(key, destination)
+    assert destination.read_bytes() == b"RIFF-data"
+    assert not cache.staging_path_for(key).exists()
+
+
+def test_discover_phrases_keeps_only_literal_vits_calls() -> None:
+    document = {
+        "door_open": {
+            "sequence": [
+                {
+                    "action": "script.df_room_say_vits",
+                    "data": {"message": "門已開啟", "lang": "zh"},
+                },
+                {
+                    "action": "script.df_room_say_vits",
+                    "data": {"message": "{{ trigger.to_state.name }}"},
+                },
+                {
+                    "service": "df_vits_bridge.generate",
+                    "data": {"text": "おはよう", "lang": "ja", "output": "/media/vits/a.wav"},
+                },
+                {
+                    "action": "df_vits_bridge.broadcast",
+                    "data": {"text": "有訪客", "media_players": ["media_player.a"]},
+                },
+                {
+                    "action": "df_vits_bridge.broadcast",
+                    "data": {"text": "{{ states('sensor.visitor') }}"},
+                },
+                {"action": "media_player.play_media", "data": {"message": "ignored"}},
+            ]
+        }
+    }
+
+    assert PRERENDER.discover_phrases(document) == [
+        PRERENDER.Phrase(text="門已開啟", lang="zh", speaker=""),
+        PRERENDER.Phrase(text="おはよう", lang="ja", speaker=""),
+        PRERENDER.Phrase(text="有訪客", lang="zh", speaker=""),
+    ]
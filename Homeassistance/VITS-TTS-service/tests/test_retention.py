@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from component_loader import load_module
+
+
+RETENTION = load_module("retention")
+NOW = 1_700_000_000.0
+
+
+def write_output(directory: Path, name: str, age: float, size: int = 10) -> Path:
+    path = directory / name
+    _ = path.write_bytes(b"x" * size)
+    os.utime(path, (NOW - age, NOW - age))
+    return path
+
+
+def test_sweep_removes_files_older_than_max_age(tmp_path: Path) -> None:
+    old = write_output(tmp_path, "df-room-old.wav", age=7200)
+    fresh = write_output(tmp_path, "df-room-fresh.wav", age=60)
+
+    result = RETENTION.sweep(
+        tmp_path,
+        policy=RETENTION.RetentionPolicy(max_age=3600),
+        protected=set(),
+        now=NOW,
+    )
+
+    assert result == {"scanned": 2, "deleted": 1, "freed_bytes": 10, "kept": 1}
+    assert not old.exists()
+    assert fresh.exists()
+
+
+def test_sweep_enforces_count_and_size_oldest_first(tmp_path: Path) -> None:
+    paths = [
+        write_output(tmp_path, f"df-room-{index}.wav", age=1000 - index, size=100)
+        for index in range(5)
+    ]
+
+    _ = RETENTION.sweep(
+        tmp_path,
+        policy=RETENTION.RetentionPolicy(max_files=4, max_bytes=250),
+        protected=set(),
+        now=NOW,
+    )
+
+    assert [path.exists() for path in paths] == [False, False, False, True, True]
+
+
+def test_sweep_skips_protected_recent_cache_and_foreign_files(tmp_path: Path) -> None:
+    playing = write_output(tmp_path, "df-room-playing.wav", age=9000)
+    recent = write_output(tmp_path, "df-room-recent.wav", age=30)
+    manual = write_output(tmp_path, "manual.wav", age=9000)
+    cache_dir = tmp_path / ".cache"
+    cache_dir.mkdir()
+    cached = write_output(cache_dir, "df-room-cached.wav", age=9000)
+
+    result = RETENTION.sweep(
+        tmp_path,
+        policy=RETENTION.RetentionPolicy(max_age=60, max_files=0, min_age=600),
+        protected={playing},
+        now=NOW,
+    )
+
+    assert result["deleted"] == 0
+    assert playing.exists() and recent.exists() and manual.exists() and cached.exists()
+
+
+def test_sweep_temporaries_removes_only_stale_inflight_and_partial_files(
+    tmp_path: Path,
+) -> None:
+    stale_inflight = write_output(tmp_path, "abc.0f1e.inflight.wav", age=900, size=7)
+    stale_partial = write_output(tmp_path, "def.partial.wav", age=900, size=5)
+    live_inflight = write_output(tmp_path, "abc.9a8b.inflight.wav", age=30)
+    cached = write_output(tmp_path, "abc.wav", age=90000)
+
+    result = RETENTION.sweep_temporaries(tmp_path, min_age=600, now=NOW)
+
+    assert result == {"deleted": 2, "freed_bytes": 12}
+    assert not stale_inflight.exists() and not stale_partial.exists()
+    assert live_inflight.exists() and cached.exists()
+
+
+def test_sweep_temporaries_tolerates_missing_cache_dir(tmp_path: Path) -> None:
+    result = RETENTION.sweep_temporaries(tmp_path / ".cache", min_age=0, now=NOW)
+
+    assert result == {"deleted": 0, "freed_bytes": 0}
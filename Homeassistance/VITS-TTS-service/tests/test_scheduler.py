@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+
+from component_loader import load_module
+
+
+SCHEDULER = load_module("scheduler")
+LIMITS = {"urgent": 1, "normal": 1, "low": 1}
+
+
+def test_urgent_job_preempts_running_low_priority_synthesis() -> None:
+    events: list[str] = []
+
+    async def scenario() -> None:
+        scheduler = SCHEDULER.JobScheduler(
+            concurrency=LIMITS, max_queued={"urgent": 5, "normal": 5, "low": 5}
+        )
+
+        async def job(name: str, duration: float) -> str:
+            events.append(f"start {name}")
+            try:
+                await asyncio.sleep(duration)
+            except asyncio.CancelledError:
+                events.append(f"cancel {name}")
+                raise
+            events.append(f"done {name}")
+            return name
+
+        briefing = asyncio.ensure_future(
+            scheduler.submit("low", lambda: job("briefing", 0.05))
+        )
+        await asyncio.sleep(0.01)
+        alarm = await scheduler.submit("urgent", lambda: job("smoke", 0.01))
+        assert alarm == "smoke"
+        assert await briefing == "briefing"
+        assert scheduler.snapshot()["low"] == {
+            "queued": 0,
+            "running": 0,
+            "preempted": 1,
+        }
+
+    asyncio.run(scenario())
+
+    assert events == [
+        "start briefing",
+        "cancel briefing",
+        "start smoke",
+        "done smoke",
+        "start briefing",
+        "done briefing",
+    ]
+
+
+def test_lower_lane_waits_while_urgent_work_is_queued() -> None:
+    order: list[str] = []
+
+    async def scenario() -> None:
+        scheduler = SCHEDULER.JobScheduler(
+            concurrency=LIMITS,
+            max_queued={"urgent": 5, "normal": 5, "low": 5},
+            preempt=False,
+        )
+
+        async def job(name: str) -> None:
+            order.append(name)
+            await asyncio.sleep(0.005)
+
+        first = asyncio.ensure_future(scheduler.submit("urgent", lambda: job("urgent-1")))
+        await asyncio.sleep(0)
+        await asyncio.gather(
+            scheduler.submit("normal", lambda: job("normal")),
+            scheduler.submit("urgent", lambda: job("urgent-2")),
+            first,
+        )
+
+    asyncio.run(scenario())
+
+    assert order == ["urgent-1", "urgent-2", "normal"]
+
+
+def test_full_lane_rejects_immediately() -> None:
+    async def scenario() -> None:
+        scheduler = SCHEDULER.JobScheduler(
+            concurrency=LIMITS, max_queued={"urgent": 1, "normal": 1, "low": 1}
+        )
+        blocker = asyncio.Event()
+        running = asyncio.ensure_future(scheduler.submit("normal", blocker.wait))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(scheduler.submit("normal", blocker.wait))
+        await asyncio.sleep(0)
+
+        try:
+            await scheduler.submit("normal", blocker.wait)
+        except SCHEDULER.QueueFullError as error:
+            assert "normal queue is full" in str(error)
+        else:
+            raise AssertionError("expected QueueFullError")
+
+        blocker.set()
+        await asyncio.gather(running, waiting)
+        assert scheduler.queued() == 0 and scheduler.running() == 0
+
+    asyncio.run(scenario())
+
+
+def test_zero_max_queued_admits_only_jobs_that_start_immediately() -> None:
+    async def scenario() -> None:
+        scheduler = SCHEDULER.JobScheduler(
+            concurrency=LIMITS, max_queued={"urgent": 0, "normal": 0, "low": 0}
+        )
+        changes: list[int] = []
+        _ = scheduler.add_listener(lambda: changes.append(scheduler.running()))
+        blocker = asyncio.Event()
+
+        running = asyncio.ensure_future(scheduler.submit("normal", blocker.wait))
+        await asyncio.sleep(0)
+        assert scheduler.snapshot()["normal"]["running"] == 1
+
+        try:
+            await scheduler.submit("normal", blocker.wait)
+        except SCHEDULER.QueueFullError:
+            pass
+        else:
+            raise AssertionError("expected QueueFullError")
+
+        blocker.set()
+        assert await running is True
+        assert changes[0] == 1 and changes[-1] == 0
+
+    asyncio.run(scenario())
@@ -23,22 +23,25 @@ def test_vits_script_uses_unique_output_filename_per_run() -> None:
     assert "output_filename:" in content
     assert "context.id" in content
     assert "output_path:" in content
-    assert "media_source_path:" in content
-    assert "playback_url:" in content
     assert "response_variable: shell_response" in content
 
 
-def test_vits_script_plays_generated_run_specific_media_path() -> None:
+def test_vits_script_broadcasts_to_all_players_without_fixed_delay() -> None:
     content = SCRIPTS_PATH.read_text(encoding="utf-8")
+    vits_section = content.split("df_room_say_vits:", 1)[1]
 
-    assert "output: '{{ output_path }}'" in content
-    assert "media_content_id: '{{ playback_url }}'" in content
+    assert "action: df_vits_bridge.broadcast" in vits_section
+    assert "output: '{{ output_path }}'" in vits_section
+    assert "media_players: '{{ target_media_players }}'" in vits_section
+    assert "delay:" not in vits_section
+    assert "for_each:" not in vits_section
     assert "df-room-latest.wav" not in content
-    assert "192.168.11.201:8123/media/local/vits/" in content
 
 
-def test_vits_script_stops_when_generation_fails() -> None:
+def test_vits_script_relies_on_broadcast_raising_on_failure() -> None:
     content = SCRIPTS_PATH.read_text(encoding="utf-8")
+    vits_section = content.split("df_room_say_vits:", 1)[1]
 
-    assert 'shell_response["returncode"]' in content
-    assert "stop: VITS generation failed" in content
+    # broadcast raises on every failure, so a returncode check could never fire
+    assert "returncode" not in vits_section
+    assert "stop: VITS generation failed" not in vits_section
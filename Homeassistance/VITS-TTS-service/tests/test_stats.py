@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from component_loader import load_module
+
+
+STATS = load_module("stats")
+
+
+def test_request_timer_reports_stage_and_total_milliseconds() -> None:
+    ticks = iter([0.0, 0.010, 0.015, 0.020, 0.520, 0.600])
+    timer = STATS.RequestTimer(clock=lambda: next(ticks))
+
+    with timer.stage("sanitize"):
+        pass
+    with timer.stage("synthesis"):
+        pass
+
+    assert timer.as_dict() == {
+        "sanitize_ms": 5.0,
+        "synthesis_ms": 500.0,
+        "total_ms": 600.0,
+    }
+
+
+def test_request_timer_merges_only_the_successful_attempt() -> None:
+    timer = STATS.RequestTimer(clock=lambda: 0.0)
+    timer.add("queue_wait", 50.0)
+    timer.add("preempted", 300.0)
+    timer.add("queue_wait", 20.0)
+    retry = STATS.RequestTimer(clock=lambda: 0.0)
+    retry.add("spawn", 2.0)
+    retry.add("synthesis", 400.0)
+
+    timer.merge(retry)
+
+    assert timer.stages == {
+        "queue_wait": 70.0,
+        "preempted": 300.0,
+        "spawn": 2.0,
+        "synthesis": 400.0,
+    }
+
+
+def test_latency_stats_tracks_rolling_percentiles_and_failures() -> None:
+    stats = STATS.LatencyStats(window=4)
+    updates: list[int] = []
+    _ = stats.add_listener(lambda: updates.append(stats.in_flight))
+
+    for total in (900.0, 100.0, 200.0, 300.0, 400.0):
+        stats.request_started()
+        stats.request_finished({"total_ms": total})
+    stats.request_started()
+    stats.request_finished(None)
+
+    assert stats.snapshot() == {
+        "last_ms": 400.0,
+        "p50_ms": 200.0,
+        "p95_ms": 400.0,
+        "in_flight": 0,
+        "failures": 1,
+        "samples": 4,
+    }
+    assert updates[:2] == [1, 0]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from component_loader import SERVICE_ROOT, load_module, load_path
+
+
+TRANSCODE = load_module("transcode")
+GENERATOR = load_path(
+    "df_room_vits_generate", SERVICE_ROOT / "bin" / "df_room_vits_generate.py"
+)
+
+
+def test_transcode_reports_size_reduction_with_fake_encoder(tmp_path: Path) -> None:
+    fake_ffmpeg = tmp_path / "fake-ffmpeg.sh"
+    _ = fake_ffmpeg.write_text(
+        '#!/bin/sh\nfor last; do :; done\nprintf "opus" > "$last"\n',
+        encoding="utf-8",
+    )
+    fake_ffmpeg.chmod(0o755)
+    wav_path = tmp_path / "df-room-1.wav"
+    _ = wav_path.write_bytes(b"x" * 40)
+
+    result = TRANSCODE.transcode(
+        wav_path, TRANSCODE.resolve_format("opus"), ffmpeg_path=str(fake_ffmpeg)
+    )
+
+    assert result == {
+        "output": str(tmp_path / "df-room-1.ogg"),
+        "format": "opus",
+        "mime_type": "audio/ogg",
+        "wav_bytes": 40,
+        "output_bytes": 4,
+        "size_reduction": 0.9,
+    }
+    assert not wav_path.exists()
+
+
+def test_wav_format_passes_output_through(tmp_path: Path) -> None:
+    wav_path = tmp_path / "df-room-1.wav"
+    _ = wav_path.write_bytes(b"x" * 8)
+
+    result = TRANSCODE.transcode(wav_path, TRANSCODE.resolve_format(""))
+
+    assert result["output"] == str(wav_path)
+    assert result["mime_type"] == "audio/x-wav"
+    assert wav_path.exists()
+
+
+def test_resolve_format_rejects_unknown_codec() -> None:
+    try:
+        _ = TRANSCODE.resolve_format("flac")
+    except ValueError as error:
+        assert str(error) == "unsupported output format: flac"
+    else:
+        raise AssertionError("expected ValueError for unsupported format")
+
+
+@pytest.mark.parametrize("name", ["opus", "mp3"])
+@pytest.mark.parametrize("bitrate", ["", "48k"])
+def test_bridge_and_generator_encode_identically(name: str, bitrate: str) -> None:
+    output_format = TRANSCODE.resolve_format(name)
+    wav_path = Path("/media/vits/df-room-1.wav")
+
+    bridge = TRANSCODE.build_transcode_command(
+        ffmpeg_path="ffmpeg",
+        input_path=str(wav_path),
+        output_path=str(TRANSCODE.encoded_path(wav_path, output_format)),
+        output_format=output_format,
+        bitrate=bitrate,
+    )
+    standalone = GENERATOR.build_transcode_command(
+        ffmpeg_path="ffmpeg",
+        input_path=str(wav_path),
+        output_format=name,
+        bitrate=bitrate,
+    )
+
+    assert bridge == standalone
+    assert GENERATOR.OUTPUT_FORMATS[name][1] == output_format.mime_type
+
+
+def test_bridge_and_generator_offer_the_same_formats() -> None:
+    assert sorted(GENERATOR.OUTPUT_FORMATS) == sorted(TRANSCODE.OUTPUT_FORMATS)
@@ -1,49 +1,334 @@
 # @Author d.f.
 # @Date 2022.10.20
 # This is a scipt banned ip list from my qnap syslog and others. So I can apply it to my router blacklist.
+#
+# Batch mode (default): rebuild ban-ip-list.txt from system-log.csv and the other lists.
+#   python retrive_baned_ip_from_qnap_syslog.py
+# Daemon mode: follow the live syslog and append only new bans, batched every few seconds.
+#   python retrive_baned_ip_from_qnap_syslog.py --follow /share/Public/qnap-syslog.log
+#   python retrive_baned_ip_from_qnap_syslog.py --listen-udp 0.0.0.0:514 \
+#       --router-command "ssh admin@router /jffs/scripts/ban-add.sh"
 
 
+import argparse
 import csv
- 
-#  ip list
-ips= []        
-
-
-# ---------retrieve from Qnap log. START----------
-contents = []
-with open("system-log.csv", "r", newline="", encoding='utf-8') as csvfile:
-    reader = csv.reader(csvfile)
-    for row in reader:
-        # row 是 List 的型態，可以用 print(row[0], row[1], row[2]) 分別取得印出
-        contents.append(row[7])
-
-for msg in contents:
-    if "ban list" in msg:
-        ipstring = msg[msg.find('[',10) +1 : msg.find(']', 10)]
-        ips.append(ipstring.strip())
-# ---------retrieve from Qnap log. END----------
-     
-# ---------retrieve from yuder ban ip list. START----------
-yuderfile = open("yuder's-banned-list.txt", "r")
-for ip in yuderfile:
-    ips.append(ip.strip())
-# ---------retrieve from yuder ban ip list. END----------
-
-
-# ---------retrieve from yisiang nas ban ip list. START----------
-yisiangFile = open("yisiang-nas_deny_ip_list.txt", "r")
-for ip in yisiangFile:
-    ips.append(ip.strip())
-# ---------retrieve from yisiang nas ban ip list. END----------
-
-
-# ---------Aggregate all entries-------------
-# final ip set
-ipset = set(ips)  
-f = open("ban-ip-list.txt", 'w')
-for eachip in ipset:
-    f.write(eachip + "\n")
-
-print(ipset)
-        
-        
+import ipaddress
+import os
+import queue
+import re
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# bracketed tokens in a syslog message, e.g. "... ban list ... [ 1.2.3.4 ]"
+BRACKETED = re.compile(r"\[([^\[\]]{1,64})\]")
+# longest line / datagram we keep; anything longer is not a QNAP ban entry
+MAX_LINE_BYTES = 64 * 1024
+
+
+def extract_banned_ip(msg):
+    """Return the banned IP from a QNAP "ban list" message, or None."""
+    if "ban list" not in msg:
+        return None
+    for candidate in BRACKETED.findall(msg):
+        try:
+            return str(ipaddress.ip_address(candidate.strip()))
+        except ValueError:
+            continue
+    return None
+
+
+def build_ban_list():
+    """Batch mode: merge QNAP csv export and the shared lists into ban-ip-list.txt."""
+    #  ip list
+    ips = []
+
+    # ---------retrieve from Qnap log. START----------
+    contents = []
+    with open("system-log.csv", "r", newline="", encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        for row in reader:
+            # row 是 List 的型態，可以用 print(row[0], row[1], row[2]) 分別取得印出
+            contents.append(row[7])
+
+    for msg in contents:
+        ip = extract_banned_ip(msg)
+        if ip:
+            ips.append(ip)
+    # ---------retrieve from Qnap log. END----------
+
+    # ---------retrieve from yuder ban ip list. START----------
+    with open("yuder's-banned-list.txt", "r") as yuderfile:
+        for ip in yuderfile:
+            ips.append(ip.strip())
+    # ---------retrieve from yuder ban ip list. END----------
+
+    # ---------retrieve from yisiang nas ban ip list. START----------
+    with open("yisiang-nas_deny_ip_list.txt", "r") as yisiangFile:
+        for ip in yisiangFile:
+            ips.append(ip.strip())
+    # ---------retrieve from yisiang nas ban ip list. END----------
+
+    # ---------Aggregate all entries-------------
+    # final ip set
+    ipset = set(ips)
+    with open("ban-ip-list.txt", 'w') as f:
+        for eachip in ipset:
+            f.write(eachip + "\n")
+
+    print(ipset)
+
+
+# ---------daemon mode: sources. START----------
+def follow_file(path, poll_interval=1.0, from_start=False):
+    """Yield lines appended to path, surviving rename-and-recreate and copytruncate rotation."""
+    handle = None
+    inode = None
+    partial = b""
+
+    def drain():
+        nonlocal partial
+        while True:
+            chunk = handle.readline(MAX_LINE_BYTES)
+            if not chunk:
+                return
+            partial += chunk
+            if partial.endswith(b"\n") or len(partial) >= MAX_LINE_BYTES:
+                line = partial.decode("utf-8", errors="replace").rstrip("\r\n")
+                partial = b""
+                yield line
+
+    while True:
+        if handle is None:
+            try:
+                handle = open(path, "rb")
+            except FileNotFoundError:
+                time.sleep(poll_interval)
+                continue
+            inode = os.fstat(handle.fileno()).st_ino
+            if not from_start:
+                handle.seek(0, os.SEEK_END)
+            # a file that appears after rotation is new: read it from the beginning
+            from_start = True
+
+        yield from drain()
+
+        try:
+            current = os.stat(path)
+        except FileNotFoundError:
+            current = None  # rotated away, new file not created yet: keep the old handle
+
+        if current is not None and current.st_ino != inode:
+            # rotated: pick up whatever syslogd wrote to the old file before switching
+            yield from drain()
+            handle.close()
+            handle = None
+            partial = b""
+        elif current is not None and current.st_size < handle.tell():
+            # truncated in place (copytruncate)
+            handle.seek(0)
+            partial = b""
+        else:
+            time.sleep(poll_interval)
+
+
+def listen_udp(host, port):
+    """Bind now (so a taken port fails at startup), then yield syslog messages received as UDP datagrams."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind((host, port))
+    except OSError:
+        sock.close()
+        raise
+    print("listening for syslog on udp://%s:%d" % (host, port), file=sys.stderr)
+
+    def receive():
+        while True:
+            datagram, _ = sock.recvfrom(MAX_LINE_BYTES)
+            for line in datagram.decode("utf-8", errors="replace").splitlines():
+                yield line
+
+    return receive()
+# ---------daemon mode: sources. END----------
+
+
+# ---------daemon mode: batching. START----------
+def load_known(path, max_known):
+    """Seed the seen-set with the most recent entries of the existing output file."""
+    known = OrderedDict()
+    try:
+        with open(path, "r") as existing:
+            for line in existing:
+                ip = line.strip()
+                if ip:
+                    known[ip] = None
+                    known.move_to_end(ip)
+                    if len(known) > max_known:
+                        known.popitem(last=False)
+    except FileNotFoundError:
+        pass
+    return known
+
+
+def next_batch(ips, window, batch_size, wait=None):
+    """Block for the first IP (at most `wait` seconds), then collect more for up to `window` seconds.
+
+    Returns (batch, ended); ended is True once the source has finished. The
+    batch is empty when `wait` runs out before any IP arrives.
+    """
+    try:
+        first = ips.get(timeout=wait)
+    except queue.Empty:
+        return [], False
+    if first is None:
+        return [], True
+    batch = [first]
+    deadline = time.monotonic() + window
+    while len(batch) < batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            ip = ips.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if ip is None:
+            return batch, True
+        batch.append(ip)
+    return batch, False
+
+
+def push_to_router(command, ips):
+    """Run the router command once with the new IPs as extra arguments."""
+    try:
+        subprocess.run(shlex.split(command) + ips, check=True, timeout=60)
+        return True
+    except (OSError, subprocess.SubprocessError) as error:
+        print("router command failed, will retry: %s" % error, file=sys.stderr)
+        return False
+
+
+def run_daemon(lines, args):
+    """Stream bans from lines to the output file and router, one small batch at a time.
+
+    The reader thread blocks once `queue_size` IPs are waiting, so a slow router
+    command slows the tail instead of growing memory (UDP senders then fall back
+    on the kernel socket buffer). The seen-set is capped at `max_known` entries.
+    IPs the router command failed on are retried every `window` seconds, even
+    when no new bans arrive, and once more on exit. An error raised by the
+    source is re-raised here after the IPs read before it are written.
+    """
+    ips = queue.Queue(maxsize=args.queue_size)
+    failure = []
+
+    def read():
+        try:
+            for line in lines:
+                ip = extract_banned_ip(line)
+                if ip:
+                    ips.put(ip)
+        except Exception as error:
+            # handed to the main thread so the daemon exits non-zero
+            failure.append(error)
+        finally:
+            ips.put(None)
+
+    threading.Thread(target=read, name="syslog-reader", daemon=True).start()
+
+    known = load_known(args.output, args.max_known)
+    router_pending = []
+    print("daemon started, %d known IPs in %s" % (len(known), args.output), file=sys.stderr)
+
+    ended = False
+    while not ended:
+        try:
+            wait = args.window if router_pending else None
+            batch, ended = next_batch(ips, args.window, args.batch_size, wait)
+        except KeyboardInterrupt:
+            break
+
+        additions = []
+        for ip in dict.fromkeys(batch):
+            if ip in known:
+                known.move_to_end(ip)
+                continue
+            known[ip] = None
+            if len(known) > args.max_known:
+                known.popitem(last=False)
+            additions.append(ip)
+
+        if additions:
+            with open(args.output, "a") as f:
+                for eachip in additions:
+                    f.write(eachip + "\n")
+            print("banned %d new IPs: %s" % (len(additions), " ".join(additions)))
+            sys.stdout.flush()
+
+        if args.router_command:
+            # these IPs are already in the output file and the seen-set, so a failed
+            # push is only retried from here; drop (and report) only past max_known
+            router_pending += additions
+            if len(router_pending) > args.max_known:
+                dropped = router_pending[:-args.max_known]
+                router_pending = router_pending[-args.max_known:]
+                print("router retry list full, %d IPs not pushed (still in %s): %s"
+                      % (len(dropped), args.output, " ".join(dropped)), file=sys.stderr)
+            if router_pending and push_to_router(args.router_command, router_pending):
+                router_pending = []
+
+    if router_pending and not push_to_router(args.router_command, router_pending):
+        print("exiting with %d IPs not pushed to the router (still in %s): %s"
+              % (len(router_pending), args.output, " ".join(router_pending)), file=sys.stderr)
+    if failure:
+        raise failure[0]
+# ---------daemon mode: batching. END----------
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host.strip("[]") or "0.0.0.0", int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a router ban list from QNAP syslog bans.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--follow", metavar="FILE", help="daemon mode: tail a syslog file (handles rotation)")
+    source.add_argument("--listen-udp", metavar="[HOST:]PORT", help="daemon mode: receive syslog over UDP")
+    parser.add_argument("--from-start", action="store_true", help="with --follow, read the existing file first")
+    parser.add_argument("--output", default="ban-ip-list.txt", help="ban list to append new IPs to (default: ban-ip-list.txt)")
+    parser.add_argument("--router-command", metavar="CMD", help="command run with each batch of new IPs appended as arguments")
+    parser.add_argument("--window", type=float, default=2.0, help="seconds to collect IPs into one batch (default: 2)")
+    parser.add_argument("--batch-size", type=int, default=256, help="flush a batch early at this many IPs (default: 256)")
+    parser.add_argument("--queue-size", type=int, default=1024, help="IPs waiting before the reader blocks (default: 1024)")
+    parser.add_argument("--max-known", type=int, default=200000, help="IPs remembered for de-duplication (default: 200000)")
+    args = parser.parse_args()
+
+    if not (args.follow or args.listen_udp):
+        build_ban_list()
+        return
+
+    # fail before "daemon started" when the source cannot be opened at all
+    try:
+        if args.follow:
+            try:
+                open(args.follow, "rb").close()
+            except FileNotFoundError:
+                pass  # follow_file waits for it to appear
+            lines = follow_file(args.follow, from_start=args.from_start)
+        else:
+            lines = listen_udp(*parse_address(args.listen_udp))
+    except OSError as error:
+        sys.exit("cannot open syslog source: %s" % error)
+
+    try:
+        run_daemon(lines, args)
+    except OSError as error:
+        sys.exit("syslog source failed: %s" % error)
+
+
+if __name__ == "__main__":
+    main()
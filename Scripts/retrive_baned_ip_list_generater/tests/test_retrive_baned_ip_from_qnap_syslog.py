@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import queue
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+
+SCRIPT = Path(__file__).resolve().parents[1] / "retrive_baned_ip_from_qnap_syslog.py"
+SPEC = importlib.util.spec_from_file_location("retrive_baned_ip_from_qnap_syslog", SCRIPT)
+assert SPEC is not None and SPEC.loader is not None
+BANS = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(BANS)
+
+
+@pytest.mark.parametrize(
+    ("message", "expected"),
+    [
+        ("[Security] 192.0.2.7 added to the ban list [ 192.0.2.7 ]", "192.0.2.7"),
+        ("[SSH] ban list add [2001:DB8::1]", "2001:db8::1"),
+        ("ban list [ not-an-ip ] then [ 198.51.100.2 ]", "198.51.100.2"),
+        ("ban list [ 192.0.2.7", None),
+        ("ban list [[192.0.2.7]]", "192.0.2.7"),
+        ("ban list [ 999.1.1.1 ]", None),
+        ("login failed from [ 192.0.2.7 ]", None),
+        ("", None),
+    ],
+)
+def test_extract_banned_ip(message: str, expected: str | None) -> None:
+    assert BANS.extract_banned_ip(message) == expected
+
+
+def filled(*items: str | None) -> queue.Queue:
+    ips: queue.Queue = queue.Queue()
+    for item in items:
+        ips.put(item)
+    return ips
+
+
+def test_next_batch_stops_at_window() -> None:
+    started = time.monotonic()
+    assert BANS.next_batch(filled("192.0.2.1"), 0.05, 10) == (["192.0.2.1"], False)
+    assert time.monotonic() - started >= 0.05
+
+
+def test_next_batch_stops_at_batch_size() -> None:
+    ips = filled("a", "b", "c", "d")
+    assert BANS.next_batch(ips, 5.0, 3) == (["a", "b", "c"], False)
+    assert BANS.next_batch(ips, 0.01, 3) == (["d"], False)
+
+
+def test_next_batch_wait_timeout_returns_empty_batch() -> None:
+    assert BANS.next_batch(filled(), 5.0, 3, wait=0.01) == ([], False)
+
+
+def test_next_batch_ends_on_sentinel() -> None:
+    assert BANS.next_batch(filled("a", None, "b"), 5.0, 10) == (["a"], True)
+    assert BANS.next_batch(filled(None), 5.0, 10) == ([], True)
+
+
+def follow_in_background(path: Path) -> queue.Queue:
+    lines: queue.Queue = queue.Queue()
+
+    def pump() -> None:
+        for line in BANS.follow_file(str(path), poll_interval=0.01):
+            lines.put(line)
+
+    threading.Thread(target=pump, daemon=True).start()
+    return lines
+
+
+def append(path: Path, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as handle:
+        _ = handle.write(text)
+
+
+def test_follow_file_survives_rename_and_copytruncate(tmp_path: Path) -> None:
+    log = tmp_path / "qnap.log"
+    _ = log.write_text("already there\n", encoding="utf-8")
+    lines = follow_in_background(log)
+    time.sleep(0.05)
+
+    append(log, "first\n")
+    assert lines.get(timeout=2) == "first"
+
+    # rename-and-recreate, with syslogd still writing one line to the old file
+    rotated = tmp_path / "qnap.log.1"
+    os.rename(log, rotated)
+    append(rotated, "late\n")
+    _ = log.write_text("second\n", encoding="utf-8")
+    assert lines.get(timeout=2) == "late"
+    assert lines.get(timeout=2) == "second"
+
+    append(log, "a longer third line\n")
+    assert lines.get(timeout=2) == "a longer third line"
+
+    # copytruncate: same inode, shorter than what was already read
+    with open(log, "r+", encoding="utf-8") as handle:
+        _ = handle.truncate(0)
+    append(log, "fourth\n")
+    assert lines.get(timeout=2) == "fourth"
+    assert lines.empty()
+
+
+def daemon_args(tmp_path: Path, router_command: str | None) -> types.SimpleNamespace:
+    return types.SimpleNamespace(
+        output=str(tmp_path / "ban-ip-list.txt"),
+        router_command=router_command,
+        window=0.01,
+        batch_size=16,
+        queue_size=16,
+        max_known=100,
+    )
+
+
+def test_run_daemon_reraises_source_failure_after_writing_bans(tmp_path: Path) -> None:
+    def lines():
+        yield "ban list [ 192.0.2.9 ]"
+        raise PermissionError("syslog unreadable")
+
+    args = daemon_args(tmp_path, None)
+    with pytest.raises(PermissionError):
+        BANS.run_daemon(lines(), args)
+    assert Path(args.output).read_text() == "192.0.2.9\n"
+
+
+def test_run_daemon_reports_ips_left_unpushed_on_exit(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    failing_router = "%s -c 'import sys; sys.exit(1)'" % sys.executable
+    BANS.run_daemon(iter(["ban list [ 192.0.2.10 ]"]), daemon_args(tmp_path, failing_router))
+    assert "exiting with 1 IPs not pushed to the router" in capsys.readouterr().err
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from updater_loader import load_updater
+
+
+_ = pytest.importorskip("requests")
+_ = pytest.importorskip("urllib3")
+
+UPDATER = load_updater()
+
+
+def cli_args(**overrides) -> argparse.Namespace:
+    values = {
+        "username": None,
+        "password": None,
+        "endpoint": [],
+        "image": ["nginx"],
+        "service": [],
+        "index_file": "index.json",
+        "refresh_index": False,
+        "concurrency": 2,
+    }
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+@pytest.fixture
+def messages(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, str]]:
+    logged: list[tuple[str, str]] = []
+    monkeypatch.setattr(UPDATER, "print_message", lambda level, message: logged.append((level, message)))
+
+    def no_prompt(prompt: str, is_secret: bool = False) -> str:
+        raise AssertionError(f"unexpected prompt: {prompt}")
+
+    monkeypatch.setattr(UPDATER, "ask_for_input", no_prompt)
+    return logged
+
+
+def write_inventory(tmp_path: Path, instances: object) -> str:
+    path = tmp_path / "portainers.json"
+    _ = path.write_text(json.dumps(instances), encoding="utf-8")
+    return str(path)
+
+
+def test_load_inventory_builds_one_config_per_instance(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, messages
+) -> None:
+    monkeypatch.setenv("SITE_A_PASSWORD", "from-env")
+    inventory = write_inventory(
+        tmp_path,
+        {
+            "instances": [
+                {
+                    "name": "site-a",
+                    "url": "https://a.example.com/",
+                    "username": "ops",
+                    "password_env": "SITE_A_PASSWORD",
+                    "endpoints": ["1", 2],
+                    "concurrency": "4",
+                },
+                {"url": "https://b.example.com", "password": "plain", "endpoints": 3},
+                {"url": "https://c.example.com"},
+            ]
+        },
+    )
+
+    configs = UPDATER.load_inventory(inventory, cli_args(username="admin", password="cli", endpoint=[9]))
+
+    assert [(c.name, c.username, c.password) for c in configs] == [
+        ("site-a", "ops", "from-env"),
+        ("https://b.example.com/api", "admin", "plain"),
+        ("https://c.example.com/api", "admin", "cli"),
+    ]
+    assert [c.endpoint_filters for c in configs] == [[1, 2], [3], [9]]
+    assert [c.concurrency for c in configs] == [4, 2, 2]
+    assert all(c.image_patterns == ["nginx"] for c in configs)
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        {"endpoints": ["a"]},
+        {"endpoints": [{"id": 1}]},
+        {"concurrency": "many"},
+        {"concurrency": None},
+        {"url": ""},
+        {"username": ""},
+    ],
+)
+def test_load_inventory_reports_bad_values(tmp_path: Path, messages, entry: dict) -> None:
+    instance = {"url": "https://a.example.com", "username": "ops", "password": "x", **entry}
+    inventory = write_inventory(tmp_path, [instance])
+
+    with pytest.raises(SystemExit) as raised:
+        _ = UPDATER.load_inventory(inventory, cli_args())
+
+    assert raised.value.code == 1
+    assert messages[-1][0] == "ERROR"
+
+
+def test_load_inventory_rejects_unreadable_or_empty_files(tmp_path: Path, messages) -> None:
+    for inventory in (str(tmp_path / "missing.json"), write_inventory(tmp_path, {"instances": []})):
+        with pytest.raises(SystemExit):
+            _ = UPDATER.load_inventory(inventory, cli_args())
+        assert messages[-1][0] == "ERROR"
+
+
+def test_update_instances_runs_every_instance_and_reports(
+    monkeypatch: pytest.MonkeyPatch, messages
+) -> None:
+    results = {
+        "site-a": UPDATER.InstanceReport("site-a", "https://a/api", total=3, succeeded=3),
+        "site-b": UPDATER.InstanceReport(
+            "site-b", "https://b/api", total=2, succeeded=1, failed_stacks=["db"]
+        ),
+        "site-c": UPDATER.InstanceReport("site-c", "https://c/api", error="認證失敗"),
+    }
+    threads: set[str] = set()
+
+    def fake_run_instance(config):
+        threads.add(threading.current_thread().name)
+        return results[config.name]
+
+    monkeypatch.setattr(UPDATER, "run_instance", fake_run_instance)
+    configs = [
+        UPDATER.UpdaterConfig(portainer_url=f"https://{name[-1]}/api", username="u", password="p", name=name)
+        for name in results
+    ]
+
+    reports = UPDATER.update_instances(configs)
+    assert reports == list(results.values())
+    assert threading.current_thread().name not in threads
+
+    messages.clear()
+    UPDATER.print_report(reports)
+    assert ("WARNING", "site-b: 1/2 成功 (0.0 秒)，失敗: db") in messages
+    assert ("ERROR", "site-c: 認證失敗") in messages
+    assert ("INFO", "總計處理: 5 個 Stacks") in messages
+    assert ("SUCCESS", "成功更新: 4 個 Stacks") in messages
+    assert messages[-1] == ("ERROR", "無法處理的實例: site-c")
+
+
+def test_single_instance_runs_inline_and_lists_failed_stacks(
+    monkeypatch: pytest.MonkeyPatch, messages
+) -> None:
+    report = UPDATER.InstanceReport("", "https://a/api", total=2, succeeded=1, failed_stacks=["web"])
+    monkeypatch.setattr(UPDATER, "run_instance", lambda config: report)
+    config = UPDATER.UpdaterConfig(portainer_url="https://a/api", username="u", password="p")
+
+    assert UPDATER.update_instances([config]) == [report]
+    UPDATER.print_report([report])
+    assert ("WARNING", "失敗的 Stacks: web") in messages
+    assert messages[-1] == ("WARNING", "部分 Stacks 更新失敗，請檢查上述錯誤訊息。")
+
+
+def test_url_flag_is_rejected_with_inventory(monkeypatch: pytest.MonkeyPatch, messages) -> None:
+    monkeypatch.setattr("sys.argv", ["updater", "--inventory", "missing.json", "-u", "http://a:9000"])
+
+    with pytest.raises(SystemExit) as raised:
+        _ = UPDATER.get_configuration()
+
+    assert raised.value.code == 1
+    assert messages[-1][0] == "ERROR" and "--url" in messages[-1][1]
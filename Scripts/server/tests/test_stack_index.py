@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from updater_loader import load_updater
+
+
+_ = pytest.importorskip("requests")
+_ = pytest.importorskip("urllib3")
+
+UPDATER = load_updater()
+COMPOSE = """
+services:
+  web:
+    environment:
+      image: fake   # an env var, not the service image
+    image: "ghcr.io/acme/web:2"
+  db:
+    image: library/postgres
+  worker:
+    build: .
+volumes:
+  data:
+    image: not-a-service
+"""
+
+
+def test_normalize_image_drops_docker_hub_defaults() -> None:
+    assert UPDATER.normalize_image(" docker.io/library/Nginx:1.25 ") == "nginx:1.25"
+    assert UPDATER.normalize_image("index.docker.io/acme/web") == "acme/web"
+    assert UPDATER.normalize_image("ghcr.io/acme/web:2") == "ghcr.io/acme/web:2"
+
+
+def test_split_image_defaults_tag_and_keeps_registry_port() -> None:
+    assert UPDATER.split_image("nginx") == ("nginx", "latest")
+    assert UPDATER.split_image("reg.lan:5000/app:v3") == ("reg.lan:5000/app", "v3")
+    assert UPDATER.split_image("reg.lan:5000/app") == ("reg.lan:5000/app", "latest")
+    assert UPDATER.split_image("nginx@sha256:abc") == ("nginx", None)
+
+
+@pytest.mark.parametrize(
+    ("image", "pattern", "expected"),
+    [
+        ("nginx", "nginx:latest", True),
+        ("nginx:latest", "nginx", True),
+        ("nginx:1.25", "nginx", True),
+        ("nginx:1.25", "nginx:latest", False),
+        ("docker.io/library/nginx:1.25", "nginx:1.*", True),
+        ("ghcr.io/acme/web:2", "ghcr.io/acme/*", True),
+        ("ghcr.io/acme/web:2", "ghcr.io/other/*", False),
+        ("nginx@sha256:abc", "nginx", True),
+        ("nginx@sha256:abc", "nginx:latest", False),
+    ],
+)
+def test_image_matches(image: str, pattern: str, expected: bool) -> None:
+    assert UPDATER.image_matches(image, pattern) is expected
+
+
+@pytest.mark.parametrize(
+    ("image", "pushed", "expected"),
+    [
+        ("nginx", "docker.io/library/nginx:latest", True),
+        ("nginx:1.25", "nginx", True),
+        ("nginx:1.25", "nginx:1.26", False),
+        ("acme/web:2", "other/web:2", False),
+        ("nginx@sha256:abc", "nginx", False),
+    ],
+)
+def test_pushed_image_matches(image: str, pushed: str, expected: bool) -> None:
+    assert UPDATER.pushed_image_matches(image, pushed) is expected
+
+
+def test_compose_fallback_reads_only_direct_service_image(monkeypatch: pytest.MonkeyPatch) -> None:
+    expected = {"web": "ghcr.io/acme/web:2", "db": "library/postgres"}
+    assert UPDATER.scan_compose_images(COMPOSE) == expected
+    monkeypatch.setattr(UPDATER, "yaml", None)
+    assert UPDATER.parse_compose_images(COMPOSE) == expected
+
+
+def test_compose_yaml_path_matches_fallback() -> None:
+    _ = pytest.importorskip("yaml")
+    assert UPDATER.yaml is not None
+    assert UPDATER.parse_compose_images(COMPOSE) == UPDATER.scan_compose_images(COMPOSE)
+    assert UPDATER.parse_compose_images("- just\n- a list\n") == {}
+
+
+def test_refresh_stack_index_refetches_only_changed_stacks(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    fetched: list[int] = []
+    files = {1: "services:\n  web:\n    image: acme/web:1\n", 2: "services:\n  db:\n    image: postgres:16\n"}
+
+    def fake_content(portainer_url, headers, stack_id, stack_details=None):
+        fetched.append(stack_id)
+        return files[stack_id]
+
+    monkeypatch.setattr(UPDATER, "get_stack_file_content", fake_content)
+    monkeypatch.setattr(UPDATER, "print_message", lambda level, message: None)
+    index_file = str(tmp_path / "index.json")
+    stacks = [
+        {"Id": 1, "Name": "web", "EndpointId": 2, "UpdateDate": 100},
+        {"Id": 2, "Name": "db", "EndpointId": 2, "CreationDate": 50},
+    ]
+
+    entries = UPDATER.refresh_stack_index("https://p", {}, stacks, index_file)
+    assert fetched == [1, 2]
+    assert entries["1"]["services"] == {"web": "acme/web:1"}
+
+    fetched.clear()
+    files[1] = "services:\n  web:\n    image: acme/web:2\n"
+    stacks[0]["UpdateDate"] = 101
+    entries = UPDATER.refresh_stack_index("https://p", {}, stacks, index_file)
+    assert fetched == [1]
+    assert entries["1"]["services"] == {"web": "acme/web:2"}
+    assert entries["2"]["services"] == {"db": "postgres:16"}
+
+    saved = json.loads(Path(index_file).read_text(encoding="utf-8"))
+    assert sorted(saved["instances"]["https://p"]["images"]) == ["acme/web:2", "postgres:16"]
+
+    fetched.clear()
+    _ = UPDATER.refresh_stack_index("https://p", {}, stacks, index_file, full=True)
+    assert fetched == [1, 2]
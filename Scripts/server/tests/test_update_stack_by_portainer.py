@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import http.client
+import json
+import threading
+from collections.abc import Iterator
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from updater_loader import load_updater
+
+
+_ = pytest.importorskip("requests")
+_ = pytest.importorskip("urllib3")
+
+
+UPDATER = load_updater()
+
+
+@pytest.fixture
+def webhook() -> Iterator[tuple[int, object]]:
+    debouncer = UPDATER.PushDebouncer(debounce=0.01, max_delay=1.0)
+    handler = UPDATER.make_webhook_handler(debouncer, "secret")
+    handler.log_message = lambda self, format, *args: None
+    handler.timeout = 0.2
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address[1], debouncer
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def post(port: int, headers: dict[str, str], body: bytes = b"") -> tuple[int, dict]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        connection.putrequest("POST", "/")
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        connection.endheaders(body or None)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_extract_pushed_images_understands_known_senders() -> None:
+    assert UPDATER.extract_pushed_images(
+        {"push_data": {"tag": "1.2"}, "repository": {"repo_name": "acme/web"}}
+    ) == ["acme/web:1.2"]
+    assert UPDATER.extract_pushed_images(
+        {
+            "events": [
+                {"action": "push", "target": {"repository": "app", "tag": "v3"}, "request": {"host": "reg.lan"}},
+                {"action": "push", "target": {"repository": "app"}},
+                {"action": "pull", "target": {"repository": "app", "tag": "v3"}},
+            ]
+        }
+    ) == ["reg.lan/app:v3"]
+    assert UPDATER.extract_pushed_images(
+        {"events": [{"action": "push", "target": {"repository": "app", "tag": "v3"}, "request": 3}]}
+    ) == ["app:v3"]
+    assert UPDATER.extract_pushed_images({"image": " ghcr.io/a/b:1 ", "images": ["ghcr.io/a/b:1", 7]}) == [
+        "ghcr.io/a/b:1"
+    ]
+    assert UPDATER.extract_pushed_images(["not", "a", "dict"]) == []
+
+
+def test_push_debouncer_batches_and_caps_pending(monkeypatch: pytest.MonkeyPatch) -> None:
+    debouncer = UPDATER.PushDebouncer(debounce=0.01, max_delay=1.0)
+    assert debouncer.add(["a:1", "b:1"])
+    assert debouncer.add(["a:1"])
+    assert debouncer.pending() == 2
+    assert debouncer.next_batch() == ["a:1", "b:1"]
+    assert debouncer.pending() == 0
+
+    monkeypatch.setattr(UPDATER, "MAX_PENDING_IMAGES", 2)
+    assert debouncer.add(["a:1", "b:1"])
+    assert not debouncer.add(["c:1"])
+    assert debouncer.pending() == 2
+
+
+@pytest.mark.parametrize(
+    ("headers", "body", "status"),
+    [
+        ({"X-Webhook-Token": "wrong", "Content-Length": "2"}, b"", 401),
+        ({"X-Webhook-Token": "secret"}, b"", 411),
+        ({"X-Webhook-Token": "secret", "Content-Length": "-1"}, b"", 400),
+        ({"X-Webhook-Token": "secret", "Content-Length": "abc"}, b"", 400),
+        ({"X-Webhook-Token": "secret", "Content-Length": str(1024 * 1024 + 1)}, b"", 413),
+        ({"X-Webhook-Token": "secret", "Content-Length": "10"}, b"{}", 408),
+        *(
+            ({"X-Webhook-Token": "secret", "Content-Length": str(len(body))}, body, 202)
+            for body in (
+                b'{"events": 5}',
+                b'{"events": [{"action": "push", "target": "x"}]}',
+                b'{"registry_package": {"package_version": "x"}}',
+                b'{"repository": {"repo_name": ["x"]}, "push_data": {}}',
+            )
+        ),
+    ],
+)
+def test_webhook_rejects_bad_requests(
+    webhook, headers: dict[str, str], body: bytes, status: int
+) -> None:
+    port, debouncer = webhook
+    reply = post(port, headers, body)
+    assert reply[0] == status
+    if status == 202:
+        # well-formed JSON of an unknown shape is answered, not crashed on
+        assert reply[1] == {"queued": []}
+    assert debouncer.pending() == 0
+
+
+def test_webhook_queues_pushed_images(webhook) -> None:
+    port, debouncer = webhook
+    body = json.dumps({"image": "ghcr.io/acme/web:2"}).encode()
+    status, reply = post(
+        port, {"Authorization": "Bearer secret", "Content-Length": str(len(body))}, body
+    )
+    assert (status, reply) == (202, {"queued": ["ghcr.io/acme/web:2"]})
+    assert debouncer.pending() == 1
+
+    status, reply = post(port, {"X-Webhook-Token": "secret", "Content-Length": "5"}, b"{nope")
+    assert (status, reply) == (400, {"error": "invalid JSON"})
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+
+SCRIPT = Path(__file__).resolve().parents[1] / "update-stack-by-portainer.py"
+MODULE_NAME = "update_stack_by_portainer"
+
+
+def load_updater() -> ModuleType:
+    """Import the hyphenated updater script once and share it between test files."""
+    if MODULE_NAME in sys.modules:
+        return sys.modules[MODULE_NAME]
+    spec = importlib.util.spec_from_file_location(MODULE_NAME, SCRIPT)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[MODULE_NAME] = module
+    spec.loader.exec_module(module)
+    return module
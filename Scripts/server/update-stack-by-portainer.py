@@ -5,19 +5,37 @@
 # Script Name: update-stack-by-portainer.py
 # Description: Updates Portainer stacks by re-pulling images and redeploying
 #              via Portainer API. Supports interactive mode and CLI arguments.
+#              Keeps an image -> stack index so a single upstream image can be
+#              redeployed with --image / --service, can update several
+#              Portainer instances concurrently from an inventory file, and
+#              can run as a webhook daemon that redeploys only the stacks
+#              using a freshly pushed image.
 # Author:      TreasureBox Scripts
-# Version:     2.0.0
-# Depends:     requests
+# Version:     2.3.0
+# Depends:     requests (PyYAML optional, used to parse stack files when present)
 # ==============================================================================
 
 import argparse
+import fnmatch
 import getpass
+import hmac
+import json
 import requests
 import urllib3
 import time
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional; fall back to a line scanner
+    yaml = None
 
 # --- Style Definitions (ANSI Escape Codes for Colors) ---
 C_RESET = "\033[0m"
@@ -32,6 +50,62 @@ C_MAGENTA = "\033[0;35m"
 # Suppress only the single InsecureRequestWarning from urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Image -> stack index cache (one section per Portainer URL)
+DEFAULT_INDEX_FILE = os.path.join(os.path.expanduser("~"), ".cache", "portainer-stack-index.json")
+INDEX_VERSION = 1
+DOCKER_HUB_PREFIXES = ("docker.io/", "index.docker.io/", "registry-1.docker.io/")
+INDEX_LOCK = threading.Lock()
+
+# Webhook daemon limits
+MAX_WEBHOOK_BODY = 1024 * 1024
+MAX_PENDING_IMAGES = 1000
+WEBHOOK_READ_TIMEOUT = 10
+
+# Instance name shown in front of every message while several instances run concurrently
+_log_context = threading.local()
+
+
+class PortainerError(Exception):
+    """Raised when a Portainer instance cannot be authenticated or listed."""
+
+
+@dataclass
+class UpdaterConfig:
+    """Connection settings and stack selectors for one Portainer instance."""
+    portainer_url: str
+    username: str
+    password: str
+    name: str = ""
+    endpoint_filters: list[int] = field(default_factory=list)
+    image_patterns: list[str] = field(default_factory=list)
+    service_patterns: list[str] = field(default_factory=list)
+    index_file: str = DEFAULT_INDEX_FILE
+    refresh_index: bool = False
+    concurrency: int = 1
+    pushed_images: list[str] = field(default_factory=list)
+
+
+@dataclass
+class DaemonConfig:
+    """Listener and debounce settings for webhook daemon mode."""
+    host: str
+    port: int
+    token: Optional[str] = None
+    debounce: float = 15.0
+    max_delay: float = 120.0
+
+
+@dataclass
+class InstanceReport:
+    """Outcome of one instance's run, collected into the consolidated report."""
+    name: str
+    portainer_url: str
+    total: int = 0
+    succeeded: int = 0
+    failed_stacks: list[str] = field(default_factory=list)
+    error: Optional[str] = None
+    duration: float = 0.0
+
 def print_message(level: str, message: str) -> None:
     """Print formatted message with color coding."""
     colors = {
@@ -54,6 +128,9 @@ def print_message(level: str, message: str) -> None:
     
     color = colors.get(level.upper(), C_RESET)
     prefix = prefix_map.get(level.upper(), f'[{level.upper()}] ')
+    instance = getattr(_log_context, "instance", None)
+    if instance:
+        prefix = f"{prefix}[{instance}] "
     
     stream = sys.stderr if level.upper() == 'ERROR' else sys.stdout
     print(f"{color}{prefix}{message}{C_RESET}", file=stream)
@@ -88,8 +165,97 @@ def validate_url(url: str) -> str:
     
     return url
 
-def get_configuration() -> tuple[str, str, str, Optional[int]]:
-    """Get Portainer URL, username, password and optional endpoint filter from command line args or interactive input."""
+def load_inventory(inventory_file: str, args: argparse.Namespace) -> list[UpdaterConfig]:
+    """Read Portainer instances (url, credentials, endpoints, concurrency) from a JSON or YAML inventory."""
+    try:
+        with open(inventory_file, encoding="utf-8") as handle:
+            if inventory_file.endswith((".yaml", ".yml")):
+                if yaml is None:
+                    print_message("ERROR", "讀取 YAML inventory 需要安裝 PyYAML，或改用 JSON 格式。")
+                    sys.exit(1)
+                document = yaml.safe_load(handle)
+            else:
+                document = json.load(handle)
+    except (OSError, ValueError) as e:
+        print_message("ERROR", f"無法讀取 inventory 檔案 {inventory_file}: {e}")
+        sys.exit(1)
+
+    entries = document.get("instances") if isinstance(document, dict) else document
+    if not isinstance(entries, list) or not entries:
+        print_message("ERROR", f"inventory 檔案 {inventory_file} 中沒有 instances。")
+        sys.exit(1)
+
+    configs = []
+    for position, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            print_message("ERROR", f"inventory 第 {position} 個實例格式錯誤。")
+            sys.exit(1)
+
+        portainer_url = validate_url(str(entry.get("url", "")))
+        name = str(entry.get("name") or portainer_url or f"#{position}")
+        if not portainer_url:
+            print_message("ERROR", f"實例 {name} 缺少有效的 url。")
+            sys.exit(1)
+
+        username = entry.get("username") or args.username
+        if not username:
+            print_message("ERROR", f"實例 {name} 缺少 username。")
+            sys.exit(1)
+
+        # Prefer password_env so secrets stay out of the inventory file
+        password = entry.get("password")
+        if not password and entry.get("password_env"):
+            password = os.environ.get(entry["password_env"])
+        if not password:
+            password = args.password
+        if not password:
+            password = ask_for_input(f"請輸入 {name} 的 Portainer 密碼", is_secret=True)
+        if not password:
+            print_message("ERROR", f"實例 {name} 的密碼不能為空。")
+            sys.exit(1)
+
+        endpoints = entry.get("endpoints") or []
+        if not isinstance(endpoints, list):
+            endpoints = [endpoints]
+        try:
+            endpoint_filters = [int(endpoint) for endpoint in endpoints]
+        except (TypeError, ValueError):
+            print_message("ERROR", f"實例 {name} 的 endpoints 必須是整數或整數列表: {entry.get('endpoints')!r}")
+            sys.exit(1)
+
+        try:
+            concurrency = max(1, int(entry.get("concurrency", args.concurrency)))
+        except (TypeError, ValueError):
+            print_message("ERROR", f"實例 {name} 的 concurrency 必須是整數: {entry.get('concurrency')!r}")
+            sys.exit(1)
+
+        configs.append(UpdaterConfig(
+            portainer_url=portainer_url,
+            username=username,
+            password=password,
+            name=name,
+            endpoint_filters=endpoint_filters or args.endpoint,
+            image_patterns=args.image,
+            service_patterns=args.service,
+            index_file=args.index_file,
+            refresh_index=args.refresh_index,
+            concurrency=concurrency,
+        ))
+        print_message("INFO", f"實例 {name}: {portainer_url} (使用者: {username}, 並行數: {configs[-1].concurrency})")
+
+    return configs
+
+def parse_listen_address(value: str) -> tuple[str, int]:
+    """Parse --listen as PORT or HOST:PORT (defaults to 127.0.0.1)."""
+    host, _, port = value.rpartition(":")
+    try:
+        return host or "127.0.0.1", int(port)
+    except ValueError:
+        print_message("ERROR", f"無效的監聽位址 '{value}'，格式應為 PORT 或 HOST:PORT。")
+        sys.exit(1)
+
+def get_configuration() -> tuple[list[UpdaterConfig], Optional[DaemonConfig]]:
+    """Get Portainer instances, endpoint filters, stack selectors and daemon settings from command line args, an inventory file or interactive input."""
     parser = argparse.ArgumentParser(
         description="透過 Portainer API 自動重新拉取映像並重新部署 Stacks。",
         formatter_class=argparse.RawTextHelpFormatter,
@@ -99,6 +265,10 @@ def get_configuration() -> tuple[str, str, str, Optional[int]]:
     python {sys.argv[0]} -u http://localhost:9000 -U admin -P password
     python {sys.argv[0]} --url https://portainer.example.com --username admin --password mypass
     python {sys.argv[0]} -u http://localhost:9000 -U admin -P password -e 2  # 只更新 endpoint 2
+
+  {C_CYAN}指定映像 / 服務:{C_RESET}
+    python {sys.argv[0]} -u http://localhost:9000 -U admin -P password --image 'ghcr.io/foo/bar'
+    python {sys.argv[0]} -u http://localhost:9000 -U admin -P password --image 'linuxserver/*' --service plex
   
   {C_CYAN}互動模式:{C_RESET}
     python {sys.argv[0]}  # 將會提示輸入所有必要資訊
@@ -106,6 +276,20 @@ def get_configuration() -> tuple[str, str, str, Optional[int]]:
   {C_CYAN}混合模式:{C_RESET}
     python {sys.argv[0]} -u http://localhost:9000 -U admin  # 密碼透過安全輸入
     python {sys.argv[0]} -u http://localhost:9000 -U admin -e 1  # 只更新 endpoint 1
+
+  {C_CYAN}多個 Portainer 實例 (inventory):{C_RESET}
+    python {sys.argv[0]} --inventory portainers.json --concurrency 2
+    # portainers.json:
+    # {{"instances": [
+    #   {{"name": "site-a", "url": "https://a.example.com", "username": "admin",
+    #     "password_env": "PORTAINER_A_PASSWORD", "endpoints": [1, 2], "concurrency": 3}},
+    #   {{"name": "site-b", "url": "https://b.example.com", "username": "admin",
+    #     "password_env": "PORTAINER_B_PASSWORD"}}
+    # ]}}
+
+  {C_CYAN}Webhook daemon (registry / CI 推送後自動更新):{C_RESET}
+    python {sys.argv[0]} --inventory portainers.json --listen 0.0.0.0:9876 --webhook-token s3cret
+    curl -X POST -H 'X-Webhook-Token: s3cret' -d '{{"image": "ghcr.io/foo/bar:latest"}}' http://host:9876/
 """
     )
     
@@ -116,31 +300,121 @@ def get_configuration() -> tuple[str, str, str, Optional[int]]:
     )
     parser.add_argument(
         "-U", "--username",
-        help="Portainer 使用者名稱。",
+        help="Portainer 使用者名稱（使用 --inventory 時作為未設定 username 的實例預設值）。",
         metavar="USERNAME"
     )
     parser.add_argument(
         "-P", "--password",
-        help="Portainer 密碼（建議透過互動模式安全輸入）。",
+        help="Portainer 密碼（建議透過互動模式安全輸入；使用 --inventory 時作為\n"
+             "未設定 password / password_env 的實例預設值）。",
         metavar="PASSWORD"
     )
     parser.add_argument(
         "-e", "--endpoint",
         type=int,
-        help="指定要更新的 Endpoint ID（例如: 1, 2, 3）。如未指定則更新所有 endpoints。",
+        action="append",
+        default=[],
+        help="指定要更新的 Endpoint ID（例如: 1, 2, 3，可重複指定）。如未指定則更新所有 endpoints。",
         metavar="ENDPOINT_ID"
     )
+    parser.add_argument(
+        "-I", "--inventory",
+        help="多個 Portainer 實例的 inventory 檔案 (JSON，或安裝 PyYAML 後可用 YAML)。\n"
+             "各實例同時認證與更新，並使用各自的帳密與 endpoints 篩選。",
+        metavar="FILE"
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=1,
+        help="每個實例同時更新的 Stack 數量（inventory 中的 concurrency 優先，預設: 1）。",
+        metavar="N"
+    )
+    parser.add_argument(
+        "-i", "--image",
+        action="append",
+        default=[],
+        help="只更新使用符合此映像的 Stacks（支援萬用字元，可重複指定）。\n"
+             "未指定 tag 時符合所有 tag，例如 'ghcr.io/foo/bar' 或 'nginx'。",
+        metavar="PATTERN"
+    )
+    parser.add_argument(
+        "-s", "--service",
+        action="append",
+        default=[],
+        help="只更新包含此服務名稱的 Stacks（支援萬用字元，可重複指定）。",
+        metavar="NAME"
+    )
+    parser.add_argument(
+        "--index-file",
+        default=DEFAULT_INDEX_FILE,
+        help=f"映像 -> Stack 索引檔位置（預設: {DEFAULT_INDEX_FILE}）。",
+        metavar="PATH"
+    )
+    parser.add_argument(
+        "--refresh-index",
+        action="store_true",
+        help="忽略快取，重新解析所有 Stacks 的 StackFileContent。"
+    )
+    parser.add_argument(
+        "-l", "--listen",
+        help="以 webhook daemon 模式執行，監聽 [HOST:]PORT（預設 HOST: 127.0.0.1）。\n"
+             "接受 Docker Hub、Docker Registry notifications、GitHub registry_package\n"
+             "或 {\"image\": \"...\"} / {\"images\": [...]} 格式的 POST。",
+        metavar="[HOST:]PORT"
+    )
+    parser.add_argument(
+        "--webhook-token",
+        default=os.environ.get("PORTAINER_WEBHOOK_TOKEN"),
+        help="要求 webhook 帶上此 token（X-Webhook-Token、Bearer 或 ?token=）。\n"
+             "預設讀取環境變數 PORTAINER_WEBHOOK_TOKEN。",
+        metavar="TOKEN"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=15.0,
+        help="最後一次推送後等待多少秒才開始更新，合併連續推送（預設: 15）。",
+        metavar="SECONDS"
+    )
+    parser.add_argument(
+        "--max-delay",
+        type=float,
+        default=120.0,
+        help="持續有推送時，第一次推送後最多等待多少秒就開始更新（預設: 120）。",
+        metavar="SECONDS"
+    )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="啟用詳細輸出。"
     )
-      args = parser.parse_args()
+    args = parser.parse_args()
     
     # Header
-    print_message("HEADER", "Portainer Stack Updater v2.0")
+    print_message("HEADER", "Portainer Stack Updater v2.3")
     print("--------------------------------------------------")
     
+    daemon_config = None
+    if args.listen:
+        host, port = parse_listen_address(args.listen)
+        daemon_config = DaemonConfig(
+            host=host,
+            port=port,
+            token=args.webhook_token,
+            debounce=max(0.0, args.debounce),
+            max_delay=max(args.debounce, args.max_delay),
+        )
+    
+    if args.inventory:
+        if args.url:
+            print_message("ERROR", "--url 不能與 --inventory 同時使用，請在 inventory 中設定各實例的 url。")
+            sys.exit(1)
+        print_message("STEP", f"正在載入 inventory: {args.inventory}")
+        configs = load_inventory(args.inventory, args)
+        print_message("SUCCESS", f"已載入 {len(configs)} 個 Portainer 實例。")
+        return configs, daemon_config
+    
     # Get Portainer URL
     portainer_url = args.url
     if not portainer_url:
@@ -171,17 +445,32 @@ def get_configuration() -> tuple[str, str, str, Optional[int]]:
         sys.exit(1)
     
     # Get Endpoint filter (optional)
-    endpoint_filter = args.endpoint
-    if endpoint_filter is not None:
-        print_message("INFO", f"將只更新 Endpoint ID: {endpoint_filter} 的 Stacks")
+    endpoint_filters = args.endpoint
+    if endpoint_filters:
+        print_message("INFO", f"將只更新 Endpoint ID: {', '.join(map(str, endpoint_filters))} 的 Stacks")
     else:
         print_message("INFO", "將更新所有 Endpoints 的 Stacks")
     
+    if args.image:
+        print_message("INFO", f"只更新使用映像 {', '.join(args.image)} 的 Stacks")
+    if args.service:
+        print_message("INFO", f"只更新包含服務 {', '.join(args.service)} 的 Stacks")
+    
     print_message("INFO", f"Portainer URL: {portainer_url}")
     print_message("INFO", f"使用者名稱: {username}")
     print_message("SUCCESS", "設定完成！")
     
-    return portainer_url, username, password, endpoint_filter
+    return [UpdaterConfig(
+        portainer_url=portainer_url,
+        username=username,
+        password=password,
+        endpoint_filters=endpoint_filters,
+        image_patterns=args.image,
+        service_patterns=args.service,
+        index_file=args.index_file,
+        refresh_index=args.refresh_index,
+        concurrency=max(1, args.concurrency),
+    )], daemon_config
 
 def authenticate_portainer(portainer_url: str, username: str, password: str) -> str:
     """Authenticate with Portainer and get JWT token."""
@@ -209,31 +498,325 @@ def authenticate_portainer(portainer_url: str, username: str, password: str) ->
         
         if not jwt_token:
             print_message("ERROR", "認證失敗：回應中未找到 JWT token。")
-            sys.exit(1)
+            raise PortainerError("認證失敗：回應中未找到 JWT token。")
         
         print_message("SUCCESS", "Portainer 認證成功！")
         return jwt_token
         
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 401:
-            print_message("ERROR", "認證失敗：使用者名稱或密碼錯誤。")
+            message = "認證失敗：使用者名稱或密碼錯誤。"
         elif e.response.status_code == 422:
-            print_message("ERROR", "認證失敗：請求格式錯誤。")
+            message = "認證失敗：請求格式錯誤。"
         else:
-            print_message("ERROR", f"認證失敗：HTTP {e.response.status_code}")
-        sys.exit(1)
+            message = f"認證失敗：HTTP {e.response.status_code}"
+        print_message("ERROR", message)
+        raise PortainerError(message) from e
     except requests.exceptions.RequestException as e:
         print_message("ERROR", f"認證請求失敗：{e}")
-        sys.exit(1)
+        raise PortainerError(f"認證請求失敗：{e}") from e
 
-def main():
-    """Main function to orchestrate stack updates."""
-    # Get configuration
-    portainer_url, username, password, endpoint_filter = get_configuration()
-    
-    # Authenticate and get JWT token
-    jwt_token = authenticate_portainer(portainer_url, username, password)
+def get_stack_file_content(portainer_url: str, headers: dict, stack_id: int, stack_details: Optional[dict] = None) -> Optional[str]:
+    """Return a stack's compose file, from its details or the dedicated /file endpoint."""
+    if stack_details and stack_details.get('StackFileContent'):
+        return stack_details['StackFileContent']
+    stack_file_response = requests.get(f'{portainer_url}/stacks/{stack_id}/file', headers=headers, verify=False, timeout=30)
+    stack_file_response.raise_for_status()
+    return stack_file_response.json().get('StackFileContent') or None
+
+def scan_compose_images(content: str) -> dict[str, str]:
+    """Line-based fallback for parse_compose_images when PyYAML is not installed."""
+    images = {}
+    in_services = False
+    service_indent = None
+    current_service = None
+    key_indent = None
+
+    for raw_line in content.splitlines():
+        line = raw_line.split(" #", 1)[0].rstrip()
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+
+        indent = len(line) - len(line.lstrip())
+        if indent == 0:
+            in_services = stripped == "services:"
+            service_indent = None
+            current_service = None
+            continue
+        if not in_services:
+            continue
+
+        if service_indent is None:
+            service_indent = indent
+        if indent == service_indent:
+            current_service = stripped[:-1].strip("'\"") if stripped.endswith(":") else None
+            key_indent = None
+            continue
+        if not current_service:
+            continue
+        # only the service's own keys count, not e.g. environment.image
+        if key_indent is None:
+            key_indent = indent
+        if indent == key_indent and stripped.startswith("image:"):
+            images.setdefault(current_service, stripped[len("image:"):].strip().strip("'\""))
+
+    return images
+
+def parse_compose_images(content: str) -> dict[str, str]:
+    """Map each service in a compose file to its image reference."""
+    if yaml is None:
+        return scan_compose_images(content)
+
+    try:
+        document = yaml.safe_load(content)
+    except yaml.YAMLError:
+        return scan_compose_images(content)
+
+    services = document.get('services') if isinstance(document, dict) else None
+    if not isinstance(services, dict):
+        return {}
+    return {
+        str(name): str(spec['image'])
+        for name, spec in services.items()
+        if isinstance(spec, dict) and spec.get('image')
+    }
+
+def normalize_image(reference: str) -> str:
+    """Drop the implicit Docker Hub registry and library/ namespace from an image reference."""
+    reference = reference.strip().lower()
+    for prefix in DOCKER_HUB_PREFIXES:
+        if reference.startswith(prefix):
+            reference = reference[len(prefix):]
+            break
+    if reference.startswith("library/"):
+        reference = reference[len("library/"):]
+    return reference
+
+def image_repository(reference: str) -> str:
+    """Strip the tag and digest from a normalized image reference."""
+    reference = reference.split("@", 1)[0]
+    name, _, last = reference.rpartition("/")
+    last = last.split(":", 1)[0]
+    return f"{name}/{last}" if name else last
+
+def split_image(reference: str) -> tuple[str, Optional[str]]:
+    """Split a normalized image reference into (repository, tag); digest-pinned references have no tag."""
+    if "@" in reference:
+        return image_repository(reference), None
+    repository = image_repository(reference)
+    tag = reference[len(repository) + 1:] if len(reference) > len(repository) else "latest"
+    return repository, tag
+
+def image_matches(image: str, pattern: str) -> bool:
+    """Match an image against a pattern; a pattern without a tag matches every tag, an image without one is :latest."""
+    image = normalize_image(image)
+    pattern = normalize_image(pattern)
+    repository, tag = split_image(image)
+    tagged = f"{repository}:{tag}" if tag else image
+    return fnmatch.fnmatchcase(tagged, pattern) or fnmatch.fnmatchcase(repository, pattern)
+
+def pushed_image_matches(image: str, pushed: str) -> bool:
+    """Whether a service image would pick up a push: same repository and tag (a tag-less push matches every tag)."""
+    repository, tag = split_image(normalize_image(image))
+    pushed_repository, pushed_tag = split_image(normalize_image(pushed))
+    if tag is None or repository != pushed_repository:
+        return False
+    pushed_has_tag = normalize_image(pushed) != pushed_repository
+    return not pushed_has_tag or tag == pushed_tag
+
+def stack_update_stamp(stack: dict) -> int:
+    """Portainer bumps UpdateDate whenever the stack file changes; new stacks only have CreationDate."""
+    return stack.get('UpdateDate') or stack.get('CreationDate') or 0
+
+def load_stack_index(index_file: str) -> dict:
+    try:
+        with open(index_file, encoding="utf-8") as handle:
+            index = json.load(handle)
+    except FileNotFoundError:
+        return {"version": INDEX_VERSION, "instances": {}}
+    except (OSError, ValueError) as e:
+        print_message("WARNING", f"無法讀取索引檔 {index_file}，將重新建立: {e}")
+        return {"version": INDEX_VERSION, "instances": {}}
+
+    if index.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "instances": {}}
+    return index
+
+def save_stack_index(index_file: str, index: dict) -> None:
+    directory = os.path.dirname(index_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file = f"{index_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as handle:
+        json.dump(index, handle, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temp_file, index_file)
+
+def build_image_map(stack_entries: dict) -> dict[str, list[dict]]:
+    """Invert per-stack service images into image -> [{stack, endpoint, service}]."""
+    images = {}
+    for stack_id, entry in stack_entries.items():
+        for service, image in entry["services"].items():
+            images.setdefault(image, []).append({
+                "stack_id": int(stack_id),
+                "stack_name": entry["name"],
+                "endpoint_id": entry["endpoint_id"],
+                "service": service,
+            })
+    return dict(sorted(images.items()))
+
+def refresh_stack_index(portainer_url: str, headers: dict, stacks: list[dict], index_file: str, full: bool = False) -> dict:
+    """Re-parse only stacks whose update time changed since the last run, then persist the index."""
+    with INDEX_LOCK:
+        instance = load_stack_index(index_file)["instances"].get(portainer_url, {})
+    previous = {} if full else instance.get("stacks", {})
+    stack_entries = {}
+    parsed_count = 0
+
+    for stack in stacks:
+        stack_id = str(stack['Id'])
+        stamp = stack_update_stamp(stack)
+        cached = previous.get(stack_id)
+        if cached and cached.get("updated") == stamp:
+            cached.update(name=stack['Name'], endpoint_id=stack.get('EndpointId'), status=stack.get('Status'))
+            stack_entries[stack_id] = cached
+            continue
+
+        try:
+            content = get_stack_file_content(portainer_url, headers, stack['Id'])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print_message("WARNING", f"無法獲取 Stack '{stack['Name']}' 的 StackFileContent，沿用舊索引: {e}")
+            if cached:
+                stack_entries[stack_id] = cached
+            continue
+
+        stack_entries[stack_id] = {
+            "name": stack['Name'],
+            "endpoint_id": stack.get('EndpointId'),
+            "status": stack.get('Status'),
+            "updated": stamp,
+            "services": parse_compose_images(content or ""),
+        }
+        parsed_count += 1
+
+    # Re-read under the lock: other instances may have saved their sections meanwhile
+    with INDEX_LOCK:
+        index = load_stack_index(index_file)
+        index["instances"][portainer_url] = {
+            "refreshed_at": int(time.time()),
+            "stacks": stack_entries,
+            "images": build_image_map(stack_entries),
+        }
+        try:
+            save_stack_index(index_file, index)
+        except OSError as e:
+            print_message("WARNING", f"無法寫入索引檔 {index_file}: {e}")
+
+    print_message("INFO", f"映像索引: 重新解析 {parsed_count} 個 Stacks，沿用 {len(stack_entries) - parsed_count} 個快取項目。")
+    return stack_entries
+
+def select_stacks_by_index(stacks: list[dict], stack_entries: dict, image_patterns: list[str], service_patterns: list[str], pushed_images: Optional[list[str]] = None) -> list[dict]:
+    """Keep stacks with a service matching every given selector kind (patterns of one kind are OR-ed)."""
+    selected = []
+    for stack in stacks:
+        entry = stack_entries.get(str(stack['Id']))
+        if not entry:
+            continue
+        matched = [
+            f"{service}={image}"
+            for service, image in entry["services"].items()
+            if (not image_patterns or any(image_matches(image, pattern) for pattern in image_patterns))
+            and (not service_patterns or any(fnmatch.fnmatchcase(service, pattern) for pattern in service_patterns))
+            and (not pushed_images or any(pushed_image_matches(image, pushed) for pushed in pushed_images))
+        ]
+        if matched:
+            print_message("INFO", f"  {stack['Name']} (EndpointID: {stack.get('EndpointId')}): {', '.join(matched)}")
+            selected.append(stack)
+    return selected
+
+def update_stack(portainer_url: str, headers: dict, stack: dict) -> bool:
+    """Redeploy one stack with PullImage=True, preserving its Env, prune setting and stack file."""
+    stack_id = stack['Id']
+    stack_name = stack['Name']
+    endpoint_id = stack['EndpointId']  # Get the endpoint ID for the stack
+    start_time = time.time()  # Record the start time for this stack update
+
+    try:
+        # Get the current stack details to preserve its configuration (like Env vars and StackFileContent)
+        print_message("INFO", f"正在獲取 Stack '{stack_name}' 的詳細資訊...")
+        stack_details_response = requests.get(f'{portainer_url}/stacks/{stack_id}', headers=headers, verify=False, timeout=30)
+        stack_details_response.raise_for_status()
+        stack_details = stack_details_response.json()
+        print_message("SUCCESS", f"成功獲取 Stack '{stack_name}' 的詳細資訊。")
+
+        # Prepare the update payload
+        # 'PullImage': True is crucial for forcing Portainer to re-pull the latest images for the services in the stack.
+        update_payload = {
+            'PullImage': True,
+            'PruneServices': stack_details.get('PruneServices', False), # Preserve existing PruneServices setting or default to False
+            'Env': stack_details.get('Env', [])  # Preserve existing environment variables
+        }
+
+        # Add StackFileContent if it exists in the primary details
+        # This is the Docker Compose file content.
+        if 'StackFileContent' in stack_details and stack_details['StackFileContent']:
+            update_payload['StackFileContent'] = stack_details['StackFileContent']
+            print_message("INFO", "使用主要詳細資訊中的 StackFileContent。")
+        else:
+            # If StackFileContent is not directly available (e.g., for Swarm stacks or if API response is minimal),
+            # try to retrieve it from the dedicated '/file' endpoint.
+            print_message("WARNING", f"主要詳細資訊中沒有 StackFileContent，嘗試從 /api/stacks/{stack_id}/file 端點獲取...")
+            try:
+                stack_file_content = get_stack_file_content(portainer_url, headers, stack_id)
+                if stack_file_content:
+                    update_payload['StackFileContent'] = stack_file_content
+                    print_message("SUCCESS", "成功從 /file 端點獲取 StackFileContent。")
+                else:
+                    print_message("WARNING", f"無法獲取 Stack '{stack_name}' 的 StackFileContent。更新可能無法按預期工作。")
+            except requests.exceptions.RequestException as e:
+                print_message("WARNING", f"從 /file 端點獲取 StackFileContent 失敗: {e}")
+
+        # Update the stack: Send a PUT request to the Portainer API
+        # The endpointId is passed as a query parameter for the PUT request.
+        print_message("INFO", f"正在發送更新請求給 Stack '{stack_name}' (PullImage=True)...")
+        update_url = f'{portainer_url}/stacks/{stack_id}?endpointId={endpoint_id}'
+        update_response = requests.put(update_url, headers=headers, json=update_payload, verify=False, timeout=120) # Increased timeout for update
+        update_response.raise_for_status() # Will raise an exception for 4xx/5xx status codes
+
+        end_time = time.time()  # Record the end time
+        duration = end_time - start_time  # Calculate the duration
+        print_message("SUCCESS", f"Stack {C_CYAN}{stack_name}{C_RESET} 在 {duration:.2f} 秒內成功更新！")
+        return True
+
+    except requests.exceptions.HTTPError as err:
+        print_message("ERROR", f"更新 Stack {C_CYAN}{stack_name}{C_RESET} 時發生 HTTP 錯誤: {err}")
+        if err.response is not None:
+            try:
+                error_details = err.response.json()
+                print_message("ERROR", f"API 回應: {error_details}")
+            except ValueError: # If response body is not JSON
+                print_message("ERROR", f"API 回應 (非JSON): {err.response.text[:300]}...")
+    except requests.exceptions.RequestException as e:
+        print_message("ERROR", f"更新 Stack {C_CYAN}{stack_name}{C_RESET} 時發生網路錯誤: {e}")
+    except Exception as e:
+        print_message("ERROR", f"更新 Stack {C_CYAN}{stack_name}{C_RESET} 時發生未預期錯誤: {e}")
+    return False
+
+def run_instance(config: UpdaterConfig) -> InstanceReport:
+    """Authenticate, select and update the active stacks of one Portainer instance."""
+    portainer_url = config.portainer_url
+    endpoint_filters = config.endpoint_filters
+    endpoint_label = ', '.join(map(str, endpoint_filters))
+    report = InstanceReport(name=config.name or portainer_url, portainer_url=portainer_url)
+    started = time.time()
     
+    try:
+        # Authenticate and get JWT token
+        jwt_token = authenticate_portainer(portainer_url, config.username, config.password)
+    except PortainerError as e:
+        report.error = str(e)
+        return report
+
     # Prepare headers for API authentication using JWT token
     headers = {
         'Authorization': f'Bearer {jwt_token}'
@@ -251,36 +834,47 @@ def main():
 
     except requests.exceptions.RequestException as e:
         print_message("ERROR", f"連接到 Portainer 或獲取 Stacks 失敗: {e}")
-        sys.exit(1)
+        report.error = f"連接到 Portainer 或獲取 Stacks 失敗: {e}"
+        return report
 
     # Filter only active stacks (Status == 1 typically means running/active)
     # Portainer API: Stack Status: 1 (active/running), 2 (inactive/stopped), ? (other states)
     active_stacks = [stack for stack in stacks if stack.get('Status') == 1]
 
     # Apply endpoint filter if specified
-    if endpoint_filter is not None:
-        filtered_stacks = [stack for stack in active_stacks if stack.get('EndpointId') == endpoint_filter]
+    if endpoint_filters:
+        filtered_stacks = [stack for stack in active_stacks if stack.get('EndpointId') in endpoint_filters]
         if not filtered_stacks and active_stacks:
-            print_message("WARNING", f"沒有找到 Endpoint ID {endpoint_filter} 的活動 Stacks。")
+            print_message("WARNING", f"沒有找到 Endpoint ID {endpoint_label} 的活動 Stacks。")
             print_message("INFO", "可用的 Endpoint IDs:")
             available_endpoints = set(stack.get('EndpointId') for stack in active_stacks)
             for ep_id in sorted(available_endpoints):
                 ep_stacks = [s for s in active_stacks if s.get('EndpointId') == ep_id]
                 print_message("INFO", f"  Endpoint {ep_id}: {len(ep_stacks)} 個活動 Stacks")
-            sys.exit(0)
+            return report
         active_stacks = filtered_stacks
-        print_message("INFO", f"篩選後找到 Endpoint ID {endpoint_filter} 的 {len(active_stacks)} 個活動 Stacks。")
+        print_message("INFO", f"篩選後找到 Endpoint ID {endpoint_label} 的 {len(active_stacks)} 個活動 Stacks。")
+
+    # Narrow down to stacks using the requested images / services via the persisted index
+    if config.image_patterns or config.service_patterns or config.pushed_images:
+        print_message("STEP", "正在更新映像 -> Stack 索引...")
+        stack_entries = refresh_stack_index(portainer_url, headers, stacks, config.index_file, full=config.refresh_index)
+        print_message("INFO", "符合條件的 Stacks:")
+        active_stacks = select_stacks_by_index(active_stacks, stack_entries, config.image_patterns, config.service_patterns, config.pushed_images)
+        if not active_stacks:
+            print_message("WARNING", "沒有找到使用指定映像或服務的活動 Stacks。")
+            return report
 
     if not active_stacks:
-        if endpoint_filter is not None:
-            print_message("WARNING", f"沒有找到 Endpoint ID {endpoint_filter} 的活動狀態 (Status == 1) Stacks 需要更新。")
+        if endpoint_filters:
+            print_message("WARNING", f"沒有找到 Endpoint ID {endpoint_label} 的活動狀態 (Status == 1) Stacks 需要更新。")
         else:
             print_message("WARNING", "沒有找到處於活動狀態 (Status == 1) 的 Stacks 需要更新。")
-        sys.exit(0)
+        return report
 
     # Show summary of stacks to be updated
-    if endpoint_filter is not None:
-        print_message("INFO", f"準備更新 Endpoint ID {endpoint_filter} 的 {len(active_stacks)} 個活動 Stacks。")
+    if endpoint_filters:
+        print_message("INFO", f"準備更新 Endpoint ID {endpoint_label} 的 {len(active_stacks)} 個活動 Stacks。")
     else:
         print_message("INFO", f"準備更新所有 Endpoints 的 {len(active_stacks)} 個活動 Stacks。")
         # Show breakdown by endpoint
@@ -293,94 +887,282 @@ def main():
         for ep_id in sorted(endpoint_summary.keys()):
             print_message("INFO", f"  Endpoint {ep_id}: {endpoint_summary[ep_id]} 個 Stacks")
 
-    # Update each active stack
-    success_count = 0
-    total_count = len(active_stacks)
-    
-    for i, stack in enumerate(active_stacks, 1):
-        stack_id = stack['Id']
-        stack_name = stack['Name']
-        endpoint_id = stack['EndpointId']  # Get the endpoint ID for the stack
+    # Update active stacks, at most config.concurrency at a time
+    report.total = len(active_stacks)
+
+    instance_label = getattr(_log_context, "instance", None)
 
+    def process(position: int, stack: dict) -> bool:
+        _log_context.instance = instance_label
         print(f"\n{C_MAGENTA}----------------------------------------------------{C_RESET}")
-        print_message("STEP", f"處理 Stack {i}/{total_count}: {C_CYAN}{stack_name}{C_RESET} (ID: {stack_id}, EndpointID: {endpoint_id})")
-        start_time = time.time()  # Record the start time for this stack update
+        print_message("STEP", f"處理 Stack {position}/{report.total}: {C_CYAN}{stack['Name']}{C_RESET} (ID: {stack['Id']}, EndpointID: {stack['EndpointId']})")
+        return update_stack(portainer_url, headers, stack)
 
-        try:
-            # Get the current stack details to preserve its configuration (like Env vars and StackFileContent)
-            print_message("INFO", f"正在獲取 Stack '{stack_name}' 的詳細資訊...")
-            stack_details_response = requests.get(f'{portainer_url}/stacks/{stack_id}', headers=headers, verify=False, timeout=30)
-            stack_details_response.raise_for_status()
-            stack_details = stack_details_response.json()
-            print_message("SUCCESS", f"成功獲取 Stack '{stack_name}' 的詳細資訊。")
-
-            # Prepare the update payload
-            # 'PullImage': True is crucial for forcing Portainer to re-pull the latest images for the services in the stack.
-            update_payload = {
-                'PullImage': True,
-                'PruneServices': stack_details.get('PruneServices', False), # Preserve existing PruneServices setting or default to False
-                'Env': stack_details.get('Env', [])  # Preserve existing environment variables
-            }
-
-            # Add StackFileContent if it exists in the primary details
-            # This is the Docker Compose file content.
-            if 'StackFileContent' in stack_details and stack_details['StackFileContent']:
-                update_payload['StackFileContent'] = stack_details['StackFileContent']
-                print_message("INFO", "使用主要詳細資訊中的 StackFileContent。")
-            else:
-                # If StackFileContent is not directly available (e.g., for Swarm stacks or if API response is minimal),
-                # try to retrieve it from the dedicated '/file' endpoint.
-                print_message("WARNING", f"主要詳細資訊中沒有 StackFileContent，嘗試從 /api/stacks/{stack_id}/file 端點獲取...")
-                try:
-                    stack_file_response = requests.get(f'{portainer_url}/stacks/{stack_id}/file', headers=headers, verify=False, timeout=30)
-                    stack_file_response.raise_for_status()
-                    stack_file_data = stack_file_response.json()
-                    stack_file_content = stack_file_data.get('StackFileContent')
-                    if stack_file_content:
-                        update_payload['StackFileContent'] = stack_file_content
-                        print_message("SUCCESS", "成功從 /file 端點獲取 StackFileContent。")
-                    else:
-                        print_message("WARNING", f"無法獲取 Stack '{stack_name}' 的 StackFileContent。更新可能無法按預期工作。")
-                except requests.exceptions.RequestException as e:
-                    print_message("WARNING", f"從 /file 端點獲取 StackFileContent 失敗: {e}")
-
-            # Update the stack: Send a PUT request to the Portainer API
-            # The endpointId is passed as a query parameter for the PUT request.
-            print_message("INFO", f"正在發送更新請求給 Stack '{stack_name}' (PullImage=True)...")
-            update_url = f'{portainer_url}/stacks/{stack_id}?endpointId={endpoint_id}'
-            update_response = requests.put(update_url, headers=headers, json=update_payload, verify=False, timeout=120) # Increased timeout for update
-            update_response.raise_for_status() # Will raise an exception for 4xx/5xx status codes
-
-            end_time = time.time()  # Record the end time
-            duration = end_time - start_time  # Calculate the duration
-            success_count += 1
-            print_message("SUCCESS", f"Stack {C_CYAN}{stack_name}{C_RESET} 在 {duration:.2f} 秒內成功更新！")
-
-        except requests.exceptions.HTTPError as err:
-            print_message("ERROR", f"更新 Stack {C_CYAN}{stack_name}{C_RESET} 時發生 HTTP 錯誤: {err}")
-            if err.response is not None:
-                try:
-                    error_details = err.response.json()
-                    print_message("ERROR", f"API 回應: {error_details}")
-                except ValueError: # If response body is not JSON
-                    print_message("ERROR", f"API 回應 (非JSON): {err.response.text[:300]}...")
-        except requests.exceptions.RequestException as e:
-            print_message("ERROR", f"更新 Stack {C_CYAN}{stack_name}{C_RESET} 時發生網路錯誤: {e}")
-        except Exception as e:
-            print_message("ERROR", f"更新 Stack {C_CYAN}{stack_name}{C_RESET} 時發生未預期錯誤: {e}")
+    with ThreadPoolExecutor(max_workers=config.concurrency) as pool:
+        results = list(pool.map(process, range(1, report.total + 1), active_stacks))
+
+    for stack, succeeded in zip(active_stacks, results):
+        if succeeded:
+            report.succeeded += 1
+        else:
+            report.failed_stacks.append(stack['Name'])
+    report.duration = time.time() - started
+    return report
+
+def run_instance_labeled(config: UpdaterConfig) -> InstanceReport:
+    """Run one instance in a worker thread, tagging its messages with the instance name."""
+    _log_context.instance = config.name or config.portainer_url
+    try:
+        return run_instance(config)
+    finally:
+        _log_context.instance = None
+
+def print_report(reports: list[InstanceReport]) -> None:
+    """Print one consolidated report covering every instance."""
+    total_count = sum(report.total for report in reports)
+    success_count = sum(report.succeeded for report in reports)
 
     print(f"\n{C_MAGENTA}============================================================{C_RESET}")
     print_message("HEADER", f"Stack 更新完成報告")
+    if len(reports) > 1:
+        for report in reports:
+            if report.error:
+                print_message("ERROR", f"{report.name}: {report.error}")
+            elif report.failed_stacks:
+                print_message("WARNING", f"{report.name}: {report.succeeded}/{report.total} 成功 ({report.duration:.1f} 秒)，失敗: {', '.join(report.failed_stacks)}")
+            else:
+                print_message("SUCCESS", f"{report.name}: {report.succeeded}/{report.total} 成功 ({report.duration:.1f} 秒)")
     print_message("INFO", f"總計處理: {total_count} 個 Stacks")
     print_message("SUCCESS", f"成功更新: {success_count} 個 Stacks")
     if success_count < total_count:
         print_message("WARNING", f"失敗或跳過: {total_count - success_count} 個 Stacks")
+        if len(reports) == 1:
+            print_message("WARNING", f"失敗的 Stacks: {', '.join(reports[0].failed_stacks)}")
     
-    if success_count == total_count:
+    failed_instances = [report.name for report in reports if report.error]
+    if failed_instances:
+        print_message("ERROR", f"無法處理的實例: {', '.join(failed_instances)}")
+    elif success_count == total_count:
         print_message("SUCCESS", "所有活動 Stacks 已成功更新！")
     else:
         print_message("WARNING", "部分 Stacks 更新失敗，請檢查上述錯誤訊息。")
 
+def update_instances(configs: list[UpdaterConfig]) -> list[InstanceReport]:
+    """Run every instance; several instances are authenticated and updated at the same time."""
+    if len(configs) == 1:
+        return [run_instance(configs[0])]
+
+    # Instances are independent: authenticate and update all of them at once
+    print_message("STEP", f"同時更新 {len(configs)} 個 Portainer 實例...")
+    with ThreadPoolExecutor(max_workers=len(configs)) as pool:
+        return list(pool.map(run_instance_labeled, configs))
+
+def extract_pushed_images(payload: object) -> list[str]:
+    """Pull image references out of Docker Hub, Docker Registry, GitHub and generic CI webhook payloads."""
+    if not isinstance(payload, dict):
+        return []
+    images = []
+
+    # Generic CI: {"image": "ghcr.io/foo/bar:1.2"} or {"images": [...]}
+    if isinstance(payload.get("image"), str):
+        images.append(payload["image"])
+    if isinstance(payload.get("images"), list):
+        images.extend(image for image in payload["images"] if isinstance(image, str))
+
+    # Docker Hub: {"push_data": {"tag": ...}, "repository": {"repo_name": ...}}
+    repository = payload.get("repository")
+    push_data = payload.get("push_data")
+    if isinstance(repository, dict) and isinstance(push_data, dict) and isinstance(repository.get("repo_name"), str):
+        tag = push_data.get("tag")
+        images.append(f"{repository['repo_name']}:{tag}" if isinstance(tag, str) and tag else repository["repo_name"])
+
+    # Docker Registry notifications: {"events": [{"action": "push", "target": {...}, "request": {"host": ...}}]}
+    events = payload.get("events")
+    for event in events if isinstance(events, list) else []:
+        if not isinstance(event, dict) or event.get("action") != "push":
+            continue
+        target = event.get("target")
+        # Blob pushes and untagged manifest pushes carry no tag and cannot be mapped to a stack
+        if not isinstance(target, dict) or not isinstance(target.get("repository"), str) or not isinstance(target.get("tag"), str):
+            continue
+        request = event.get("request")
+        host = request.get("host") if isinstance(request, dict) else None
+        reference = f"{target['repository']}:{target['tag']}"
+        images.append(f"{host}/{reference}" if isinstance(host, str) and host else reference)
+
+    # GitHub (registry_package / package events)
+    package = payload.get("registry_package") or payload.get("package")
+    if isinstance(package, dict):
+        version = package.get("package_version")
+        package_url = version.get("package_url") if isinstance(version, dict) else None
+        if isinstance(package_url, str):
+            images.append(package_url)
+
+    return list(dict.fromkeys(image.strip() for image in images if image.strip()))
+
+class PushDebouncer:
+    """Collects pushed images and releases them as one batch once pushes go quiet.
+
+    A batch is released ``debounce`` seconds after the last push, or
+    ``max_delay`` seconds after the first one if pushes keep arriving. While a
+    batch is being deployed, new pushes queue up for the next one; past
+    MAX_PENDING_IMAGES new images are refused so the webhook sender retries.
+    """
+
+    def __init__(self, debounce: float, max_delay: float) -> None:
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._condition = threading.Condition()
+        self._pending: dict[str, None] = {}
+        self._first_push = 0.0
+        self._last_push = 0.0
+
+    def add(self, images: list[str]) -> bool:
+        with self._condition:
+            new_images = [image for image in images if image not in self._pending]
+            if len(self._pending) + len(new_images) > MAX_PENDING_IMAGES:
+                return False
+            now = time.monotonic()
+            if not self._pending:
+                self._first_push = now
+            self._last_push = now
+            self._pending.update(dict.fromkeys(new_images))
+            self._condition.notify()
+            return True
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def next_batch(self) -> list[str]:
+        with self._condition:
+            while True:
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                due = min(self._last_push + self.debounce, self._first_push + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining <= 0:
+                    batch = list(self._pending)
+                    self._pending.clear()
+                    return batch
+                self._condition.wait(remaining)
+
+def make_webhook_handler(debouncer: PushDebouncer, token: Optional[str]) -> type[BaseHTTPRequestHandler]:
+    """Build the HTTP handler class bound to a debouncer and optional shared token."""
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        server_version = "PortainerStackUpdater/2.3"
+        # a client that sends less than its Content-Length must not hold a thread forever
+        timeout = WEBHOOK_READ_TIMEOUT
+
+        def log_message(self, format: str, *args) -> None:
+            print_message("INFO", f"Webhook {self.client_address[0]}: {format % args}")
+
+        def send_json(self, status: int, body: dict) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def authorized(self) -> bool:
+            if not token:
+                return True
+            supplied = self.headers.get("X-Webhook-Token", "")
+            authorization = self.headers.get("Authorization", "")
+            if not supplied and authorization.startswith("Bearer "):
+                supplied = authorization[len("Bearer "):]
+            if not supplied:
+                supplied = parse_qs(urlparse(self.path).query).get("token", [""])[0]
+            return hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8"))
+
+        def do_GET(self) -> None:
+            if urlparse(self.path).path != "/healthz":
+                self.send_json(404, {"error": "not found"})
+                return
+            self.send_json(200, {"status": "ok", "pending": debouncer.pending()})
+
+        def do_POST(self) -> None:
+            if not self.authorized():
+                self.send_json(401, {"error": "invalid token"})
+                return
+
+            header = self.headers.get("Content-Length")
+            if header is None:
+                self.send_json(411, {"error": "Content-Length required"})
+                return
+            try:
+                length = int(header)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.send_json(400, {"error": "invalid Content-Length"})
+                return
+            if length > MAX_WEBHOOK_BODY:
+                self.send_json(413, {"error": "payload too large"})
+                return
+            try:
+                body = self.rfile.read(length)
+            except TimeoutError:
+                self.send_json(408, {"error": "request body timed out"})
+                return
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                self.send_json(400, {"error": "invalid JSON"})
+                return
+
+            images = extract_pushed_images(payload)
+            if not images:
+                self.send_json(202, {"queued": []})
+                return
+            if not debouncer.add(images):
+                self.send_json(503, {"error": "too many pending images"})
+                return
+            print_message("INFO", f"收到映像推送: {', '.join(images)}")
+            self.send_json(202, {"queued": images})
+
+    return WebhookHandler
+
+def run_daemon(configs: list[UpdaterConfig], daemon_config: DaemonConfig) -> None:
+    """Listen for push webhooks and redeploy only the stacks using the pushed images, one debounced batch at a time."""
+    debouncer = PushDebouncer(daemon_config.debounce, daemon_config.max_delay)
+    server = ThreadingHTTPServer((daemon_config.host, daemon_config.port), make_webhook_handler(debouncer, daemon_config.token))
+    threading.Thread(target=server.serve_forever, name="webhook", daemon=True).start()
+
+    print_message("SUCCESS", f"Webhook daemon 已啟動: http://{daemon_config.host}:{server.server_address[1]}/ (debounce {daemon_config.debounce:g} 秒，最長 {daemon_config.max_delay:g} 秒)")
+    if not daemon_config.token:
+        print_message("WARNING", "未設定 --webhook-token，任何能連到此埠的人都能觸發更新。")
+
+    try:
+        while True:
+            batch = debouncer.next_batch()
+            print(f"\n{C_MAGENTA}============================================================{C_RESET}")
+            print_message("STEP", f"開始處理 {len(batch)} 個推送的映像: {', '.join(batch)}")
+            reports = update_instances([replace(config, pushed_images=batch) for config in configs])
+            print_report(reports)
+    except KeyboardInterrupt:
+        print_message("INFO", "正在停止 webhook daemon...")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def main():
+    """Main function to orchestrate stack updates."""
+    # Get configuration
+    configs, daemon_config = get_configuration()
+
+    if daemon_config is not None:
+        run_daemon(configs, daemon_config)
+        return
+
+    reports = update_instances(configs)
+    print_report(reports)
+    if any(report.error for report in reports):
+        sys.exit(1)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()